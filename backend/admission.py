@@ -0,0 +1,202 @@
+"""
+Admission control for Phase II Todo App
+
+Requests are sorted into classes (auth, todo reads, todo writes), and
+each class runs at most a configured number of requests at a time. Up to
+a bounded number more wait in a FIFO queue, each for at most the queue
+timeout. Anything beyond that is rejected at once with 503 and
+Retry-After. When the database slows down, a worker then keeps a bounded
+amount of work in flight instead of piling requests up behind the
+connection pool until clients give up, and the requests it does admit
+finish in roughly normal time.
+
+The read and write limits together default to the primary pool's
+capacity (pool_size 10 + max_overflow 20), so admitted requests do not
+queue again for a connection. A limit of 0 disables admission control
+for that class. Health, metrics and the event stream are never limited.
+
+Configuration (environment):
+    ADMISSION_AUTH_CONCURRENCY: concurrent auth requests (default 8)
+    ADMISSION_READ_CONCURRENCY: concurrent todo reads (default 20)
+    ADMISSION_WRITE_CONCURRENCY: concurrent todo writes, batches included (default 10)
+    ADMISSION_QUEUE_SIZE: requests waiting per class (default 100)
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: longest wait for a slot (default 2)
+    ADMISSION_RETRY_AFTER_SECONDS: Retry-After sent with a 503 (default 1)
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from backend.metrics import Counter, Gauge, Histogram
+
+ADMISSION_AUTH_CONCURRENCY = int(os.getenv("ADMISSION_AUTH_CONCURRENCY", "8"))
+ADMISSION_READ_CONCURRENCY = int(os.getenv("ADMISSION_READ_CONCURRENCY", "20"))
+ADMISSION_WRITE_CONCURRENCY = int(os.getenv("ADMISSION_WRITE_CONCURRENCY", "10"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "100"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+
+# Request classes
+AUTH = "auth"
+READ = "read"
+WRITE = "write"
+
+# Long-lived or operational endpoints that bypass admission control
+UNLIMITED_PATHS = {"/api/todos/stream"}
+
+READ_METHODS = {"GET", "HEAD"}
+
+ADMISSION_ACTIVE = Gauge("admission_active_requests", "Requests admitted and running, by class", ["request_class"])
+ADMISSION_QUEUED = Gauge("admission_queue_depth", "Requests waiting for admission, by class", ["request_class"])
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests rejected with 503, by class and reason (queue_full, timeout)",
+    ["request_class", "reason"],
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_wait_seconds",
+    "Time admitted requests spent waiting in the queue, by class",
+    ["request_class"],
+)
+
+
+def classify(scope) -> Optional[str]:
+    """Request class for an HTTP scope, or None if it is not limited."""
+    path = scope["path"]
+    if path in UNLIMITED_PATHS:
+        return None
+    if path.startswith("/api/auth/"):
+        return AUTH
+    if path == "/api/todos" or path.startswith("/api/todos/"):
+        return READ if scope["method"] in READ_METHODS else WRITE
+    if path == "/api/batch":
+        return WRITE
+    return None
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a bounded FIFO wait queue and a wait deadline."""
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def _update_gauges(self):
+        ADMISSION_ACTIVE.set(self.active, request_class=self.name)
+        ADMISSION_QUEUED.set(len(self._waiters), request_class=self.name)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if needed. False means reject."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._update_gauges()
+            return True
+
+        if len(self._waiters) >= self.queue_size:
+            ADMISSION_REJECTED.inc(request_class=self.name, reason="queue_full")
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        start = time.perf_counter()
+        try:
+            # wait() leaves the future alone on timeout, so a slot handed
+            # over at the last moment is noticed below rather than lost
+            await asyncio.wait([waiter], timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # The client went away while queued
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+
+        if waiter.done():
+            ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - start, request_class=self.name)
+            return True
+
+        self._discard(waiter)
+        ADMISSION_REJECTED.inc(request_class=self.name, reason="timeout")
+        return False
+
+    def _discard(self, waiter: asyncio.Future):
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        self._update_gauges()
+
+    def release(self):
+        """Free a slot, handing it straight to the oldest waiter if there is one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.active -= 1
+        self._update_gauges()
+
+
+def _limiters() -> Dict[str, AdmissionLimiter]:
+    limits = {
+        AUTH: ADMISSION_AUTH_CONCURRENCY,
+        READ: ADMISSION_READ_CONCURRENCY,
+        WRITE: ADMISSION_WRITE_CONCURRENCY,
+    }
+    return {
+        name: AdmissionLimiter(name, limit, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_SECONDS)
+        for name, limit in limits.items()
+        if limit > 0
+    }
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware applying the per-class limits, shedding load with 503."""
+
+    def __init__(self, app, limiters: Optional[Dict[str, AdmissionLimiter]] = None):
+        self.app = app
+        self.limiters = _limiters() if limiters is None else limiters
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_class = classify(scope)
+        limiter = self.limiters.get(request_class)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": "Server is busy, please retry"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(ADMISSION_RETRY_AFTER_SECONDS).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
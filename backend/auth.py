@@ -5,30 +5,40 @@ JWT Authentication and token validation for Phase II Todo App
 from typing import Optional
 from datetime import datetime, timedelta
 from uuid import UUID
+import hashlib
 import os
+import time
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from fastapi import HTTPException
 import jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from backend.cache import LRUCache, shared_cache
+from backend.hashing import hash_pool, pwd_context
+from backend.metrics import Counter
 from backend.models import User
-from backend.db import get_session
 
 # Security scheme
 security = HTTPBearer()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")  # Load from env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
+# Verified-token cache: sha256(token) -> user_id, expiring with the token
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))  # 0 disables
+token_cache = LRUCache(TOKEN_CACHE_SIZE)
+
+TOKEN_CACHE_REQUESTS = Counter(
+    "auth_token_cache_requests_total",
+    "verify_token lookups by outcome (hit, shared_hit, miss)",
+    ["result"],
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
@@ -66,34 +76,75 @@ def create_access_token(user_id: UUID, expires_delta: Optional[timedelta] = None
     return encoded_jwt
 
 
-def authenticate_user(email: str, password: str, session: Session) -> Optional[User]:
+async def authenticate_user(email: str, password: str, session: AsyncSession) -> Optional[User]:
     """
     Authenticate a user by email and password.
-    
+
+    bcrypt verification is CPU-bound, so it runs in the password hash pool
+    instead of on the event loop.
+
     Args:
         email: User's email address
         password: Plain text password
-        session: Database session
-        
+        session: Async database session
+
     Returns:
         User object if authentication succeeds, None otherwise
     """
-    result = session.execute(select(User).where(User.email == email))
+    result = await session.execute(select(User).where(User.email == email))
     user = result.scalars().first()
-    
-    if not user or not verify_password(password, user.hashed_password):
+
+    # Return the connection to the pool before the slow verification
+    await session.close()
+
+    if not user:
+        return None
+
+    if not await hash_pool.verify(password, user.hashed_password):
         return None
     
     return user
 
 
-def verify_token(credentials: HTTPBearer = Depends(security)) -> UUID:
+async def _cached_user_id(key: bytes) -> Optional[UUID]:
+    """Look a verified token up in the local cache, then the shared cache."""
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        TOKEN_CACHE_REQUESTS.inc(result="hit")
+        return user_id
+
+    if shared_cache is not None and TOKEN_CACHE_SIZE > 0:
+        value = await shared_cache.get("token:" + key.hex())
+        if value:
+            cached_id, exp = value.decode().split(":")
+            if time.time() < int(exp):
+                user_id = UUID(cached_id)
+                token_cache.set(key, user_id, expires_at=int(exp))
+                TOKEN_CACHE_REQUESTS.inc(result="shared_hit")
+                return user_id
+
+    TOKEN_CACHE_REQUESTS.inc(result="miss")
+    return None
+
+
+async def _cache_user_id(key: bytes, user_id: UUID, exp: int):
+    token_cache.set(key, user_id, expires_at=exp)
+    if shared_cache is not None and TOKEN_CACHE_SIZE > 0:
+        await shared_cache.set("token:" + key.hex(), f"{user_id}:{exp}".encode(), ttl=exp - time.time())
+
+
+async def verify_token(credentials: HTTPBearer = Depends(security)) -> UUID:
     """
     Verify JWT token and extract user_id.
 
+    Declared async so FastAPI runs it on the event loop instead of
+    dispatching it to the threadpool. Verified tokens are cached by their
+    SHA-256 until the token's own exp, so repeat requests skip the JWT
+    decode and signature check.
+
     This is a dependency that can be used in route handlers:
         @app.get("/todos")
-        def get_todos(user_id: UUID = Depends(verify_token)):
+        async def get_todos(user_id: UUID = Depends(verify_token)):
             ...
 
     Args:
@@ -107,6 +158,11 @@ def verify_token(credentials: HTTPBearer = Depends(security)) -> UUID:
     """
     token = credentials.credentials
 
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached_user_id = await _cached_user_id(cache_key)
+    if cached_user_id is not None:
+        return cached_user_id
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
@@ -118,7 +174,7 @@ def verify_token(credentials: HTTPBearer = Depends(security)) -> UUID:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        return UUID(user_id)
+        user_uuid = UUID(user_id)
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -138,3 +194,9 @@ def verify_token(credentials: HTTPBearer = Depends(security)) -> UUID:
             detail="Authentication failed",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    exp = payload.get("exp")
+    if isinstance(exp, int):
+        await _cache_user_id(cache_key, user_uuid, exp)
+
+    return user_uuid
@@ -0,0 +1,3 @@
+"""
+Benchmark and query-plan scripts for Phase II Todo App
+"""
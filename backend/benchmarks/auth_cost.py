@@ -0,0 +1,64 @@
+"""
+Measure the per-request cost of verify_token with and without the token cache.
+
+Usage:
+    python -m backend.benchmarks.auth_cost
+    python -m backend.benchmarks.auth_cost --iterations 200000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000, help="verify_token calls per measurement")
+    return parser.parse_args()
+
+
+async def measure(verify_token, credentials, iterations: int) -> float:
+    """Mean microseconds per verify_token call."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await verify_token(credentials)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run(iterations: int):
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    from backend import auth
+
+    token = auth.create_access_token(uuid4())
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    # Uncached: an empty cache that never stores anything
+    cache = auth.token_cache
+    auth.token_cache = auth.LRUCache(0)
+    uncached_us = await measure(auth.verify_token, credentials, iterations)
+
+    auth.token_cache = cache
+    await auth.verify_token(credentials)
+    cached_us = await measure(auth.verify_token, credentials, iterations)
+
+    print(f"verify_token uncached: {uncached_us:8.2f} us/request")
+    print(f"verify_token cached:   {cached_us:8.2f} us/request")
+    print(f"speedup:               {uncached_us / cached_us:8.1f}x")
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault(
+        "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='todo-auth-'), 'auth.db')}"
+    )
+    asyncio.run(run(args.iterations))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
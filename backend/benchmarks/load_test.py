@@ -0,0 +1,351 @@
+"""
+Drive the API in-process at fixed concurrency levels and report latency as JSON.
+
+A database is seeded with --users users owning --todos-per-user todos each
+(reused on later runs against the same --database-url). Every scenario is
+then run through an in-process ASGI client at each concurrency level, and
+throughput plus p50/p95/p99 latency are written as JSON so runs can be
+compared over time.
+
+Usage:
+    python -m backend.benchmarks.load_test
+    python -m backend.benchmarks.load_test --users 10000 --todos-per-user 50000 \\
+        --database-url postgresql://localhost/todo_bench --output run.json
+    python -m backend.benchmarks.load_test --scenarios list_todos get_todo --concurrency 1 32
+
+Repeated reads of the same user and parameters are served from the
+response cache after the first one; pass --no-response-cache to measure
+the database path instead.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+BENCH_PASSWORD = "load-test-password"
+EMAIL_PREFIX = "load"
+
+# Todo ids fetched per active user for the get/update scenarios
+IDS_PER_USER = 20
+
+STATUS_FILTERS = [None, "pending", "completed"]
+PRIORITY_FILTERS = [None, "low", "medium", "high"]
+SORT_FIELDS = ["created_at", "updated_at", "due_date", "priority", "title"]
+SORT_ORDERS = ["asc", "desc"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    parser.add_argument("--users", type=int, default=100, help="Seeded users")
+    parser.add_argument("--todos-per-user", type=int, default=1000, help="Seeded todos per user")
+    parser.add_argument("--active-users", type=int, default=50, help="Seeded users that requests are spread over")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--list-requests", type=int, default=20,
+                        help="Requests per list_todos filter/sort combination and concurrency level")
+    parser.add_argument("--scenarios", nargs="+", default=None, help="Only run scenarios whose name starts with these")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for request parameters")
+    parser.add_argument("--no-response-cache", action="store_true",
+                        help="Disable the response cache so every read reaches the database")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not samples:
+        return float("nan")
+    rank = max(1, int(round(p / 100 * len(samples) + 0.5)))
+    return samples[min(rank, len(samples)) - 1]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed(engine, args) -> List[UUID]:
+    """Return the benchmark users, seeding them (and their todos) if the database has too few."""
+    from sqlalchemy import select
+
+    from backend.benchmarks.seeding import seed_todos, seed_users
+    from backend.hashing import pwd_context
+    from backend.models import User
+
+    with engine.connect() as conn:
+        existing = conn.execute(
+            select(User.id).where(User.email.like(f"{EMAIL_PREFIX}-%")).order_by(User.email).limit(args.users)
+        ).scalars().all()
+    if len(existing) >= args.users:
+        print(f"Reusing {len(existing)} seeded users", file=sys.stderr)
+        return list(existing)
+
+    print(f"Seeding {args.users} users x {args.todos_per_user} todos", file=sys.stderr)
+    start = time.perf_counter()
+    user_ids = seed_users(engine, args.users, pwd_context.hash(BENCH_PASSWORD), email_prefix=EMAIL_PREFIX)
+    for user_id in user_ids:
+        seed_todos(engine, user_id, args.todos_per_user)
+    print(f"Seeded in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return user_ids
+
+
+class Workload:
+    """Request parameters shared by the scenarios: users, tokens and todo ids."""
+
+    def __init__(self, engine, user_ids: List[UUID], active_users: int, rng: random.Random):
+        from sqlalchemy import select
+
+        from backend.auth import create_access_token
+        from backend.models import Todo, User
+
+        self.rng = rng
+        active = user_ids[:active_users]
+        self.headers = {uid: {"Authorization": f"Bearer {create_access_token(uid)}"} for uid in active}
+        self.users = list(self.headers)
+
+        self.todo_ids: Dict[UUID, List[UUID]] = {}
+        with engine.connect() as conn:
+            for uid in self.users:
+                self.todo_ids[uid] = conn.execute(
+                    select(Todo.id).where(Todo.user_id == uid).limit(IDS_PER_USER)
+                ).scalars().all()
+            self.emails = conn.execute(
+                select(User.email).where(User.id.in_(self.users))
+            ).scalars().all()
+
+        # Todos made by create_todo, consumed by delete_todo
+        self.created: List[tuple] = []
+
+    def user(self) -> UUID:
+        return self.rng.choice(self.users)
+
+    def owned_todo(self):
+        uid = self.user()
+        while not self.todo_ids[uid]:
+            uid = self.user()
+        return uid, self.rng.choice(self.todo_ids[uid])
+
+
+def list_params(status_filter, priority_filter, sort_by, sort_order) -> Dict[str, str]:
+    params = {"sort_by": sort_by, "sort_order": sort_order}
+    if status_filter:
+        params["status_filter"] = status_filter
+    if priority_filter:
+        params["priority_filter"] = priority_filter
+    return params
+
+
+def build_scenarios(work: Workload, args) -> Dict[str, tuple]:
+    """Scenario name -> (request count, coroutine function issuing one request)."""
+
+    async def create_todo(client):
+        uid = work.user()
+        response = await client.post(
+            "/api/todos",
+            json={"title": f"load {work.rng.random()}", "priority": work.rng.choice(PRIORITY_FILTERS[1:])},
+            headers=work.headers[uid],
+        )
+        if response.status_code == 201:
+            work.created.append((uid, response.json()["id"]))
+        return response
+
+    async def get_todo(client):
+        uid, todo_id = work.owned_todo()
+        return await client.get(f"/api/todos/{todo_id}", headers=work.headers[uid])
+
+    async def update_todo(client):
+        uid, todo_id = work.owned_todo()
+        return await client.put(
+            f"/api/todos/{todo_id}",
+            json={"completed": work.rng.random() < 0.5},
+            headers=work.headers[uid],
+        )
+
+    async def delete_todo(client):
+        if not work.created:
+            await create_todo(client)
+        uid, todo_id = work.created.pop()
+        return await client.delete(f"/api/todos/{todo_id}", headers=work.headers[uid])
+
+    async def stats(client):
+        return await client.get("/api/todos/stats", headers=work.headers[work.user()])
+
+    async def search(client):
+        return await client.get("/api/todos", params={"search": "todo 12"}, headers=work.headers[work.user()])
+
+    async def next_page(client):
+        headers = work.headers[work.user()]
+        first = await client.get("/api/todos", headers=headers)
+        cursor = first.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return first
+        return await client.get("/api/todos", params={"cursor": cursor}, headers=headers)
+
+    async def register_user(client):
+        return await client.post(
+            "/api/auth/register",
+            json={"email": f"{EMAIL_PREFIX}reg-{uuid4()}@example.com", "name": "load", "password": BENCH_PASSWORD},
+        )
+
+    async def login_user(client):
+        return await client.post(
+            "/api/auth/login",
+            params={"email": work.rng.choice(work.emails), "password": BENCH_PASSWORD},
+        )
+
+    scenarios = {
+        "create_todo": (args.requests, create_todo),
+        "get_todo": (args.requests, get_todo),
+        "update_todo": (args.requests, update_todo),
+        "delete_todo": (args.requests, delete_todo),
+        "stats": (args.requests, stats),
+        "list_todos_search": (args.requests, search),
+        "list_todos_next_page": (args.requests, next_page),
+        "register_user": (args.requests, register_user),
+        "login_user": (args.requests, login_user),
+    }
+
+    for combination in itertools.product(STATUS_FILTERS, PRIORITY_FILTERS, SORT_FIELDS, SORT_ORDERS):
+        params = list_params(*combination)
+        name = "list_todos[" + ",".join(f"{key}={value}" for key, value in sorted(params.items())) + "]"
+
+        async def list_todos(client, params=params):
+            return await client.get("/api/todos", params=params, headers=work.headers[work.user()])
+
+        scenarios[name] = (args.list_requests, list_todos)
+
+    if args.scenarios:
+        scenarios = {
+            name: scenario for name, scenario in scenarios.items()
+            if any(name.startswith(prefix) for prefix in args.scenarios)
+        }
+    return scenarios
+
+
+async def run_scenario(client, request: Callable, count: int, concurrency: int) -> Dict:
+    """Issue `count` requests from `concurrency` clients and summarise their latencies."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = count
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await request(client)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else None,
+        },
+    }
+
+
+async def run(args) -> Dict:
+    import httpx
+    import sqlalchemy
+
+    from backend.db import close_db, engine, init_db
+    from backend.hashing import hash_pool
+    from backend.main import app
+
+    init_db()
+    hash_pool.start()
+    try:
+        user_ids = seed(engine, args)
+        work = Workload(engine, user_ids, args.active_users, random.Random(args.seed))
+        scenarios = build_scenarios(work, args)
+
+        results = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+            for name, (count, request) in scenarios.items():
+                for concurrency in args.concurrency:
+                    result = await run_scenario(client, request, count, concurrency)
+                    results.append({"scenario": name, **result})
+                    print(
+                        f"{name:<70} c={concurrency:<4} {result['throughput_rps']:>9} req/s "
+                        f"p50={result['latency_ms']['p50']} p99={result['latency_ms']['p99']} ms "
+                        f"errors={result['errors']}",
+                        file=sys.stderr,
+                    )
+    finally:
+        hash_pool.shutdown()
+        await close_db()
+
+    return {
+        "meta": {
+            "started_at": args.started_at,
+            "git_revision": git_revision(),
+            "database": engine.dialect.name,
+            "users": args.users,
+            "todos_per_user": args.todos_per_user,
+            "active_users": args.active_users,
+            "seed": args.seed,
+            "response_cache": not args.no_response_cache,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+        },
+        "results": results,
+    }
+
+
+def main():
+    args = parse_args()
+    args.started_at = datetime.utcnow().isoformat() + "Z"
+
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='todo-load-'), 'load.db')}"
+    # backend.db reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    if args.no_response_cache:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+
+    report = asyncio.run(run(args))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
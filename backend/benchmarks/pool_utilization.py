@@ -0,0 +1,165 @@
+"""
+Measure how long each kind of request holds a pooled database connection.
+
+Every scenario is run sequentially through an in-process ASGI client,
+while pool checkout/checkin events record how many connections each
+request takes and for how long. A connection held for only part of a
+request lets the pool serve proportionally more concurrent requests: by
+Little's law, a pool of --pool-capacity connections (pool_size 10 plus
+max_overflow 20 by default, as configured for PostgreSQL) saturates at
+capacity * request time / hold time concurrent requests.
+
+Usage:
+    python -m backend.benchmarks.pool_utilization
+    python -m backend.benchmarks.pool_utilization --todos 5000 --page-size 100 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from uuid import UUID, uuid4
+
+BENCH_PASSWORD = "pool-bench-password"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    parser.add_argument("--todos", type=int, default=2000, help="Seeded todos for the benchmark user")
+    parser.add_argument("--page-size", type=int, default=100, help="list_todos page size")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario")
+    parser.add_argument("--pool-capacity", type=int, default=30, help="Connections in the pool being sized for")
+    parser.add_argument("--json", action="store_true", help="Print a JSON report instead of a table")
+    return parser.parse_args()
+
+
+class PoolWatcher:
+    """Records checkout count and total hold time across the given engines."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self.checkouts = 0
+        self.held_seconds = 0.0
+        for engine in engines:
+            event.listen(engine.pool, "checkout", self._checkout)
+            event.listen(engine.pool, "checkin", self._checkin)
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["bench_checkout_at"] = time.perf_counter()
+        self.checkouts += 1
+
+    def _checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("bench_checkout_at", None)
+        if started is not None:
+            self.held_seconds += time.perf_counter() - started
+
+    def reset(self):
+        self.checkouts = 0
+        self.held_seconds = 0.0
+
+
+async def run(args):
+    import httpx
+
+    from backend.benchmarks.seeding import seed_todos
+    from backend.db import async_engine, async_read_engine, engine
+    from backend.main import app
+
+    await app.router.startup()
+    try:
+        engines = {async_engine.sync_engine, async_read_engine.sync_engine}
+        watcher = PoolWatcher(engines)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            email = f"pool-{uuid4()}@example.com"
+            response = await client.post(
+                "/api/auth/register", json={"email": email, "name": "pool", "password": BENCH_PASSWORD}
+            )
+            user_id = response.json()["id"]
+            response = await client.post("/api/auth/login", params={"email": email, "password": BENCH_PASSWORD})
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            seed_todos(engine, UUID(user_id), args.todos)
+            todo_ids = [
+                todo["id"] for todo in
+                (await client.get("/api/todos", params={"limit": 100}, headers=headers)).json()
+            ]
+            bad_headers = {"Authorization": "Bearer not-a-token"}
+
+            counter = iter(range(10 ** 9))
+            sorts = ["created_at", "updated_at", "title"]
+            scenarios = {
+                "list_todos": lambda: client.get(
+                    "/api/todos", params={"limit": args.page_size, "sort_by": sorts[next(counter) % len(sorts)]},
+                    headers=headers,
+                ),
+                "get_todo": lambda: client.get(f"/api/todos/{todo_ids[next(counter) % len(todo_ids)]}", headers=headers),
+                "stats": lambda: client.get("/api/todos/stats", headers=headers),
+                "create_todo": lambda: client.post("/api/todos", json={"title": "pool bench"}, headers=headers),
+                "update_todo": lambda: client.put(
+                    f"/api/todos/{todo_ids[next(counter) % len(todo_ids)]}",
+                    json={"completed": next(counter) % 2 == 0}, headers=headers,
+                ),
+                "invalid_token": lambda: client.get("/api/todos", headers=bad_headers),
+                "invalid_params": lambda: client.get("/api/todos", params={"limit": "many"}, headers=headers),
+            }
+
+            report = {}
+            for name, request in scenarios.items():
+                watcher.reset()
+                request_seconds = 0.0
+                for _ in range(args.requests):
+                    start = time.perf_counter()
+                    await request()
+                    request_seconds += time.perf_counter() - start
+
+                request_ms = request_seconds / args.requests * 1000
+                held_ms = watcher.held_seconds / args.requests * 1000
+                report[name] = {
+                    "checkouts_per_request": watcher.checkouts / args.requests,
+                    "request_ms": round(request_ms, 3),
+                    "connection_held_ms": round(held_ms, 3),
+                    "held_fraction": round(held_ms / request_ms, 3),
+                    # Concurrent requests of this kind the pool can serve before
+                    # requests start queueing for a connection
+                    "pool_saturates_at": (
+                        round(args.pool_capacity * request_ms / held_ms) if held_ms else None
+                    ),
+                }
+    finally:
+        await app.router.shutdown()
+    return report
+
+
+def main():
+    args = parse_args()
+
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='todo-pool-'), 'pool.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+    # Measure the database work, not cache hits
+    os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+
+    report = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"{'scenario':<16} {'checkouts':>9} {'request ms':>11} {'held ms':>9} {'held %':>7} "
+          f"{'pool of ' + str(args.pool_capacity) + ' saturates at':>24}")
+    for name, row in report.items():
+        saturates = row["pool_saturates_at"]
+        print(f"{name:<16} {row['checkouts_per_request']:>9.2f} {row['request_ms']:>11.3f} "
+              f"{row['connection_held_ms']:>9.3f} {row['held_fraction'] * 100:>6.1f}% "
+              f"{('unbounded' if saturates is None else str(saturates)):>24}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
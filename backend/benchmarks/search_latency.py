@@ -0,0 +1,83 @@
+"""
+Measure list_todos search latency as a user's todo count grows.
+
+For each size, one user is seeded with that many todos, a handful of
+which contain a rare word. The search query is timed through the
+full-text index and through the LIKE scan it replaced.
+
+Usage:
+    python -m backend.benchmarks.search_latency
+    python -m backend.benchmarks.search_latency --sizes 1000 10000 100000 --repeat 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Todo counts per user")
+    parser.add_argument("--repeat", type=int, default=30, help="Timed runs per measurement")
+    parser.add_argument("--term", default="zebra", help="Rare search term planted in every 1000th title")
+    return parser.parse_args()
+
+
+def time_query(conn, query, repeat: int) -> float:
+    """Median wall time of `query` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    args = parse_args()
+
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='todo-search-'), 'search.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    # backend.db reads DATABASE_URL at import time
+    from backend import search
+    from backend.benchmarks.seeding import seed_todos, seed_users
+    from backend.db import engine, init_db
+    from backend.routes.todos import build_todo_list_query
+
+    init_db()
+    indexed = search._sqlite_fts_ready or search._pg_trgm_ready
+
+    def title(i: int) -> str:
+        return f"todo {i} {args.term}" if i % 1000 == 0 else f"todo {i} errand"
+
+    print(f"{'todos':>10} {'indexed ms':>12} {'LIKE scan ms':>14}")
+    for size in args.sizes:
+        user_id = seed_users(engine, 1, email_prefix=f"search-{size}")[0]
+        seed_todos(engine, user_id, size, title=title)
+
+        with engine.connect() as conn:
+            query = build_todo_list_query(user_id, search=args.term, sort_by="relevance").limit(20)
+            indexed_ms = time_query(conn, query, args.repeat) if indexed else float("nan")
+
+            # Temporarily disable the index path to time the LIKE scan
+            saved = search._sqlite_fts_ready, search._pg_trgm_ready
+            search._sqlite_fts_ready = search._pg_trgm_ready = False
+            try:
+                query = build_todo_list_query(user_id, search=args.term, sort_by="relevance").limit(20)
+                like_ms = time_query(conn, query, args.repeat)
+            finally:
+                search._sqlite_fts_ready, search._pg_trgm_ready = saved
+
+        print(f"{size:>10} {indexed_ms:>12.3f} {like_ms:>14.3f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Synthetic data for the benchmark scripts
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, update
+
+from backend.models import Priority, Todo, User
+
+# Rows per multi-row INSERT while seeding
+SEED_BATCH_SIZE = 5000
+
+
+def default_title(i: int) -> str:
+    return f"todo {i}"
+
+
+def seed_users(engine, count: int, hashed_password: str = "x", email_prefix: str = "bench") -> List[UUID]:
+    """Insert `count` users and return their ids."""
+    now = datetime.utcnow()
+    user_ids = [uuid4() for _ in range(count)]
+
+    with engine.begin() as conn:
+        for start in range(0, count, SEED_BATCH_SIZE):
+            conn.execute(insert(User), [
+                {
+                    "id": uid,
+                    "email": f"{email_prefix}-{uid}@example.com",
+                    "name": None,
+                    "hashed_password": hashed_password,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for uid in user_ids[start:start + SEED_BATCH_SIZE]
+            ])
+
+    return user_ids
+
+
+def seed_todos(engine, user_id: UUID, count: int, title: Optional[Callable[[int], str]] = None):
+    """Insert `count` todos for one user with a spread of statuses, priorities and dates."""
+    title = title or default_title
+    now = datetime.utcnow()
+    priorities = list(Priority)
+
+    with engine.begin() as conn:
+        # Change numbers, as the write endpoints would have assigned them
+        users = User.__table__
+        last_seq = conn.execute(
+            update(users)
+            .where(users.c.id == user_id)
+            .values(change_seq=users.c.change_seq + count)
+            .returning(users.c.change_seq)
+        ).scalar_one()
+        first_seq = last_seq - count + 1
+
+        for start in range(0, count, SEED_BATCH_SIZE):
+            conn.execute(insert(Todo), [
+                {
+                    "id": uuid4(),
+                    "user_id": user_id,
+                    "title": title(i),
+                    "completed": i % 3 == 0,
+                    "due_date": None if i % 4 == 0 else now + timedelta(days=i % 30 - 10),
+                    "priority": priorities[i % len(priorities)],
+                    "created_at": now - timedelta(seconds=i),
+                    "updated_at": now - timedelta(seconds=i // 2),
+                    "seq": first_seq + i,
+                }
+                for i in range(start, min(start + SEED_BATCH_SIZE, count))
+            ])
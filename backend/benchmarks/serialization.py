@@ -0,0 +1,97 @@
+"""
+Compare list_todos serialization: FastAPI's response_model path vs the fast path.
+
+The response_model path validates ORM rows against List[TodoRead] and
+renders them with JSONResponse, exactly as FastAPI does for a route. The
+fast path renders plain column rows with backend.serialization. Both
+outputs are checked to be byte-for-byte identical before timing.
+
+Usage:
+    python -m backend.benchmarks.serialization
+    python -m backend.benchmarks.serialization --sizes 20 100 1000 --repeat 500
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="Database to read rows from (default: temporary SQLite file)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000], help="Page sizes")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs per measurement")
+    return parser.parse_args()
+
+
+def time_call(function, repeat: int) -> float:
+    """Median wall time of `function()` in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    args = parse_args()
+
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='todo-json-'), 'json.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    # backend.db reads DATABASE_URL at import time
+    from typing import List
+
+    from fastapi.responses import JSONResponse
+    from fastapi.utils import create_response_field
+    from sqlalchemy.orm import Session
+
+    from backend import serialization
+    from backend.benchmarks.seeding import seed_todos, seed_users
+    from backend.db import engine, init_db
+    from backend.models import TodoRead
+    from backend.routes.todos import build_todo_list_query
+
+    init_db()
+    largest = max(args.sizes)
+    user_id = seed_users(engine, 1, email_prefix="json")[0]
+    seed_todos(engine, user_id, largest, title=lambda i: f"todo {i} — \"quoted\" ünïcode\t{i % 7}")
+
+    field = create_response_field(name="Response_list_todos", type_=List[TodoRead], mode="serialization")
+
+    def response_model_path(rows):
+        # What fastapi.routing.serialize_response does with pydantic v2
+        value, errors = field.validate(rows, {}, loc=("response",))
+        return JSONResponse(field.serialize(value)).body
+
+    def fast_path(rows):
+        return serialization.render_todos(rows)
+
+    backend = "orjson" if serialization.orjson is not None else "json"
+    print(f"fast path backend: {backend}")
+    print(f"{'page size':>10} {'response_model us':>18} {'fast path us':>14} {'speedup':>8}")
+    with Session(engine) as session:
+        for size in args.sizes:
+            orm_rows = session.execute(build_todo_list_query(user_id).limit(size)).scalars().all()
+            plain_rows = session.execute(
+                build_todo_list_query(user_id, columns=serialization.TODO_READ_COLUMNS).limit(size)
+            ).all()
+
+            if response_model_path(orm_rows) != fast_path(plain_rows):
+                print(f"output differs at page size {size}", file=sys.stderr)
+                return 1
+
+            slow_us = time_call(lambda: response_model_path(orm_rows), args.repeat)
+            fast_us = time_call(lambda: fast_path(plain_rows), args.repeat)
+            print(f"{size:>10} {slow_us:>18.1f} {fast_us:>14.1f} {slow_us / fast_us:>7.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+Compare SQLite database size and key lookup latency with UUIDs stored as hex text and as 16-byte BLOBs.
+
+Seeds a database with the current schema, rewrites a copy of it into the
+layout older versions stored (32-character hex text keys), then upgrades
+that copy back with the compact_uuids migration, timing the migration.
+Both files are vacuumed before they are measured, so the sizes compare
+equally compacted files.
+
+Lookups are the statements get_todo/update_todo/delete_todo run (one todo
+by id and user_id) and a first list_todos page (by user_id), executed
+with the app's SQLite settings on random keys after a warm-up pass.
+
+Usage:
+    python -m backend.benchmarks.uuid_storage
+    python -m backend.benchmarks.uuid_storage --users 1000 --todos 10000000 --lookups 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100, help="Users to seed")
+    parser.add_argument("--todos", type=int, default=100000, help="Todos to seed, spread evenly over the users")
+    parser.add_argument("--lookups", type=int, default=20000, help="Timed lookups per statement and layout")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the sampled keys")
+    parser.add_argument("--keep", action="store_true", help="Keep the database files")
+    parser.add_argument("--json", action="store_true", help="Print a JSON report instead of a table")
+    return parser.parse_args()
+
+
+GET_TODO_SQL = (
+    "SELECT title, completed, due_date, priority, id, user_id, created_at, updated_at "
+    "FROM todos WHERE id = ? AND user_id = ?"
+)
+LIST_TODOS_SQL = (
+    "SELECT title, completed, due_date, priority, id, user_id, created_at, updated_at "
+    "FROM todos WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT 21"
+)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """A connection with the settings the app uses (see backend.db)."""
+    from backend.db import SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def _vacuum(path: str):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def to_hex_text(path: str):
+    """Rewrite every UUID key as the 32-character hex text older versions stored."""
+    from backend.migrations import UUID_COLUMNS
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("BEGIN")
+    for table, columns in UUID_COLUMNS.items():
+        assignments = ", ".join(f"{column} = lower(hex({column}))" for column in columns)
+        conn.execute(f"UPDATE {table} SET {assignments}")
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def migrate(path: str) -> float:
+    """Run the compact_uuids migration on a file; returns its duration in seconds."""
+    from sqlalchemy import create_engine
+
+    from backend.migrations import compact_uuids
+
+    engine = create_engine(f"sqlite:///{path}")
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        compact_uuids(conn)
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    return elapsed
+
+
+def sizes(path: str) -> dict:
+    """Bytes used by the todos table, its indexes and the whole file."""
+    conn = sqlite3.connect(path)
+    pages = dict(conn.execute("SELECT name, sum(pgsize) FROM dbstat GROUP BY name").fetchall())
+    conn.close()
+    return {
+        "todos_table": pages.get("todos", 0),
+        "todos_primary_key": pages.get("sqlite_autoindex_todos_1", 0),
+        "todos_secondary_indexes": sum(size for name, size in pages.items() if name.startswith("ix_todos_")),
+        "search_index": sum(size for name, size in pages.items() if name.startswith("todos_fts")),
+        "file": os.path.getsize(path),
+    }
+
+
+def _summary(timings: list) -> dict:
+    timings = sorted(timings)
+    return {
+        "mean_us": round(statistics.fmean(timings) * 1e6, 2),
+        "p50_us": round(timings[len(timings) // 2] * 1e6, 2),
+        "p99_us": round(timings[int(len(timings) * 0.99)] * 1e6, 2),
+    }
+
+
+def compare(sql: str, layouts: dict) -> dict:
+    """
+    Time one statement on every layout. Layouts take turns on each key
+    (starting with a different one each time), so drift in machine load
+    affects them all alike.
+
+    Args:
+        layouts: {name: (connection, [params per lookup])}
+    """
+    names = list(layouts)
+    for conn, params in layouts.values():  # warm-up
+        for args in params:
+            conn.execute(sql, args).fetchall()
+
+    timings = {name: [] for name in names}
+    for i in range(len(layouts[names[0]][1])):
+        for name in names[i % len(names):] + names[:i % len(names)]:
+            conn, params = layouts[name]
+            start = time.perf_counter()
+            conn.execute(sql, params[i]).fetchall()
+            timings[name].append(time.perf_counter() - start)
+    return {name: _summary(values) for name, values in timings.items()}
+
+
+def sample_keys(path: str, count: int, rng: random.Random):
+    """Random (todo id, user id) pairs and user ids, as stored (bytes)."""
+    conn = sqlite3.connect(path)
+    max_rowid = conn.execute("SELECT max(rowid) FROM todos").fetchone()[0]
+    rowids = [rng.randint(1, max_rowid) for _ in range(count)]
+    todo_keys = []
+    for start in range(0, len(rowids), 500):
+        chunk = rowids[start:start + 500]
+        todo_keys.extend(conn.execute(
+            f"SELECT id, user_id FROM todos WHERE rowid IN ({','.join('?' * len(chunk))})", chunk
+        ).fetchall())
+    rng.shuffle(todo_keys)
+    user_keys = [user_id for _, user_id in todo_keys]
+    conn.close()
+    return todo_keys, user_keys
+
+
+def run(args, work_dir: str) -> dict:
+    from backend.benchmarks.seeding import seed_todos, seed_users
+    from backend.db import engine, init_db
+
+    path = engine.url.database
+    init_db()
+    start = time.perf_counter()
+    user_ids = seed_users(engine, args.users, email_prefix="uuid")
+    per_user, extra = divmod(args.todos, args.users)
+    for i, user_id in enumerate(user_ids):
+        seed_todos(engine, user_id, per_user + (i < extra))
+    engine.dispose()
+    seed_seconds = time.perf_counter() - start
+
+    # The layout older versions stored, then the same data after the upgrade
+    text_path = os.path.join(work_dir, "hex_text.db")
+    blob_path = os.path.join(work_dir, "blob.db")
+    _vacuum(path)
+    shutil.move(path, text_path)
+    to_hex_text(text_path)
+    _vacuum(text_path)
+    shutil.copyfile(text_path, blob_path)
+    migrate_seconds = migrate(blob_path)
+    start = time.perf_counter()
+    _vacuum(blob_path)
+    vacuum_seconds = time.perf_counter() - start
+
+    rng = random.Random(args.seed)
+    todo_keys, user_keys = sample_keys(blob_path, args.lookups, rng)
+    text_conn, blob_conn = _connect(text_path), _connect(blob_path)
+    get_todo = compare(GET_TODO_SQL, {
+        "hex_text": (text_conn, [(todo_id.hex(), user_id.hex()) for todo_id, user_id in todo_keys]),
+        "blob": (blob_conn, todo_keys),
+    })
+    list_todos = compare(LIST_TODOS_SQL, {
+        "hex_text": (text_conn, [(user_id.hex(),) for user_id in user_keys]),
+        "blob": (blob_conn, [(user_id,) for user_id in user_keys]),
+    })
+    text_conn.close()
+    blob_conn.close()
+
+    return {
+        "users": args.users,
+        "todos": args.todos,
+        "seed_seconds": round(seed_seconds, 1),
+        "migration_seconds": round(migrate_seconds, 1),
+        "vacuum_seconds": round(vacuum_seconds, 1),
+        "hex_text": {
+            "sizes": sizes(text_path),
+            "lookups": {"get_todo": get_todo["hex_text"], "list_todos_page": list_todos["hex_text"]},
+        },
+        "blob": {
+            "sizes": sizes(blob_path),
+            "lookups": {"get_todo": get_todo["blob"], "list_todos_page": list_todos["blob"]},
+        },
+    }
+
+
+def _mb(size: int) -> str:
+    return f"{size / 2 ** 20:,.1f} MB"
+
+
+def main():
+    args = parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="todo-uuid-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'seed.db')}"
+    try:
+        report = run(args, work_dir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"{report['todos']:,} todos across {report['users']:,} users "
+          f"(seeded in {report['seed_seconds']}s; migration {report['migration_seconds']}s, "
+          f"VACUUM {report['vacuum_seconds']}s)\n")
+    text_sizes, blob_sizes = report["hex_text"]["sizes"], report["blob"]["sizes"]
+    print(f"{'size':<26} {'hex text':>12} {'16-byte BLOB':>14} {'change':>8}")
+    for name in text_sizes:
+        before, after = text_sizes[name], blob_sizes[name]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "-"
+        print(f"{name:<26} {_mb(before):>12} {_mb(after):>14} {change:>8}")
+
+    print(f"\n{'lookup':<26} {'hex text':>20} {'16-byte BLOB':>20}")
+    for name in report["hex_text"]["lookups"]:
+        cells = [
+            "{mean_us:.1f} / {p99_us:.1f} us".format(**report[layout]["lookups"][name])
+            for layout in ("hex_text", "blob")
+        ]
+        print(f"{name + ' (mean / p99)':<26} {cells[0]:>20} {cells[1]:>20}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+In-process and shared caches for Phase II Todo App
+
+LRUCache is a bounded, per-process cache whose entries can expire at an
+absolute time. SharedCache talks to Redis so several workers can share
+entries; it is used only when CACHE_REDIS_URL is set and the optional
+`redis` package is installed.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with optional per-entry expiry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and time.time() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """Store a value until `expires_at` (epoch seconds) or eviction."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SharedCache:
+    """
+    Redis-backed cache shared by all workers.
+
+    Every operation degrades to a miss (or no-op) if Redis is unreachable,
+    so the shared cache can never make a request fail.
+    """
+
+    def __init__(self, url: str, prefix: str = "todo:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning("Shared cache get failed: %s", e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        try:
+            expire = max(1, int(ttl)) if ttl is not None else None
+            await self._client.set(self.prefix + key, value, ex=expire)
+        except Exception as e:
+            logger.warning("Shared cache set failed: %s", e)
+
+    async def incr(self, key: str) -> Optional[int]:
+        try:
+            return await self._client.incr(self.prefix + key)
+        except Exception as e:
+            logger.warning("Shared cache incr failed: %s", e)
+            return None
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def _create_shared_cache() -> Optional[SharedCache]:
+    if not CACHE_REDIS_URL:
+        return None
+    try:
+        return SharedCache(CACHE_REDIS_URL)
+    except ImportError:
+        logger.warning("CACHE_REDIS_URL is set but the redis package is not installed; using per-process caches only")
+        return None
+
+
+shared_cache = _create_shared_cache()
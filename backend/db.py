@@ -3,32 +3,101 @@ Database connection and session management for Phase II Todo App
 """
 
 import os
-from typing import Generator
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Generator, Optional
+from uuid import UUID
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 from sqlmodel import SQLModel
 
+from backend.auth import verify_token
+from backend.instrumentation import TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument_engine
+from backend.migrations import run_migrations
+from backend.replicas import SESSIONS_ROUTED, ReplicaRouter
+from backend.search import install_search
+from backend.stats import install_counters
+from backend.sync import install_sync_triggers
+
 
 # Get database URL from environment
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable not set")
 
-# Convert postgresql:// to postgresql+psycopg2:// for sync support
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://")
-elif DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+psycopg2://")
+# Read replicas (comma-separated URLs); reads go to the primary if unset
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_CHECK_SECONDS = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "10"))
+REPLICA_HEALTH_CHECK_TIMEOUT = float(os.getenv("REPLICA_HEALTH_CHECK_TIMEOUT", "2"))
+# Read-your-writes: after a write, the user's reads use the primary for this
+# long (0 disables). Only applies with replicas. With replicas, only these
+# primary reads are stored in the response cache.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "0"))
+
+# Session intents
+READ = "read"
+WRITE = "write"
+
+
+def _sync_database_url(url: str) -> str:
+    """Convert postgresql:// to postgresql+psycopg2:// for sync support"""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+psycopg2://")
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+psycopg2://")
+    return url
+
+
+DATABASE_URL = _sync_database_url(DATABASE_URL)
+
+
+def _async_database_url(url: str):
+    """
+    Derive the async driver URL from the sync DATABASE_URL.
+
+    PostgreSQL uses asyncpg and SQLite uses aiosqlite. asyncpg does not
+    understand libpq-only query options, so sslmode is mapped to ssl and
+    channel_binding is dropped.
+    """
+    async_url = make_url(url)
+
+    if async_url.drivername.startswith("postgresql"):
+        query = dict(async_url.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        query.pop("channel_binding", None)
+        return async_url.set(drivername="postgresql+asyncpg", query=query)
+
+    if async_url.drivername.startswith("sqlite"):
+        return async_url.set(drivername="sqlite+aiosqlite")
+
+    return async_url
+
+
+ASYNC_DATABASE_URL = _async_database_url(DATABASE_URL)
+
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite:///")
+
+# SQLite tuning (environment)
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
 
 
 # Create sync engine
-if DATABASE_URL.startswith("sqlite:///"):
+if IS_SQLITE:
     # SQLite doesn't support pool_size and max_overflow
     engine = create_engine(
         DATABASE_URL,
         echo=False,  # Set to True for SQL debugging
         pool_pre_ping=True,  # Verify connections before using
+        poolclass=TimedQueuePool,
+        pool_logging_name="sync",
     )
 else:
     # PostgreSQL supports connection pooling
@@ -38,14 +107,144 @@ else:
         pool_pre_ping=True,  # Verify connections before using
         pool_size=10,
         max_overflow=20,
+        poolclass=TimedQueuePool,
+        pool_logging_name="sync",
+    )
+
+# Create async engines (used by the API routes)
+if IS_SQLITE:
+    # SQLite allows one writer at a time: a single pooled connection
+    # serializes this process's writes, while WAL lets a separate pool of
+    # readers run alongside it without waiting for commits
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        pool_size=1,
+        max_overflow=0,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_logging_name="write",
+    )
+    async_read_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_logging_name="read",
     )
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_logging_name="async",
+    )
+    async_read_engine = async_engine
+
+
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """
+    Per-connection SQLite settings.
+
+    WAL lets readers proceed while a write is in progress, and with WAL
+    synchronous=NORMAL only fsyncs at checkpoints instead of every commit.
+    Foreign keys are unenforced unless enabled per connection; writes rely
+    on them (e.g. creating a todo for a missing user fails).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _begin_immediate_on_connect(dbapi_connection, connection_record):
+    # Let SQLAlchemy, not the driver, emit BEGIN (see _begin_immediate)
+    dbapi_connection.isolation_level = None
+
+
+def _begin_immediate(conn):
+    """
+    Take the write lock when the transaction starts. A deferred transaction
+    that reads first and writes later fails with SQLITE_BUSY (which
+    busy_timeout cannot retry) if another process wrote in between.
+    """
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _make_query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _configure_sqlite_connection)
+    event.listen(async_engine.sync_engine, "connect", _configure_sqlite_connection)
+    event.listen(async_engine.sync_engine, "connect", _begin_immediate_on_connect)
+    event.listen(async_engine.sync_engine, "begin", _begin_immediate)
+    event.listen(async_read_engine.sync_engine, "connect", _configure_sqlite_connection)
+    event.listen(async_read_engine.sync_engine, "connect", _make_query_only)
+
+# Query timing and per-request query counts (see backend.instrumentation)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+if async_read_engine is not async_engine:
+    instrument_engine(async_read_engine.sync_engine)
+
 
-# Create session factory
+def _create_replica_engine(url: str, name: str):
+    url = _sync_database_url(url)
+    if url.startswith("sqlite:///"):
+        replica = create_async_engine(
+            _async_database_url(url),
+            pool_size=SQLITE_READ_POOL_SIZE,
+            max_overflow=0,
+            poolclass=TimedAsyncAdaptedQueuePool,
+            pool_logging_name=name,
+        )
+        event.listen(replica.sync_engine, "connect", _configure_sqlite_connection)
+        event.listen(replica.sync_engine, "connect", _make_query_only)
+    else:
+        replica = create_async_engine(
+            _async_database_url(url),
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            poolclass=TimedAsyncAdaptedQueuePool,
+            pool_logging_name=name,
+        )
+    instrument_engine(replica.sync_engine)
+    return replica
+
+
+replica_router = ReplicaRouter(
+    [_create_replica_engine(url, f"replica{i}") for i, url in enumerate(DATABASE_REPLICA_URLS)],
+    fallback=async_read_engine,
+    health_check_interval=REPLICA_HEALTH_CHECK_SECONDS,
+    health_check_timeout=REPLICA_HEALTH_CHECK_TIMEOUT,
+    sticky_seconds=READ_YOUR_WRITES_SECONDS,
+)
+
+
+# Create session factories
 session = sessionmaker(
     engine,
     expire_on_commit=False,
 )
 
+async_session = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
 
 def get_session():
     """
@@ -59,11 +258,117 @@ def get_session():
         yield sess
 
 
+@event.listens_for(Session, "after_commit")
+def _record_user_write(sess):
+    user_id = sess.info.get("write_user_id")
+    if user_id is not None:
+        replica_router.record_write(user_id)
+
+
+@asynccontextmanager
+async def open_session(intent: str = WRITE, user_id: Optional[UUID] = None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Open an async session bound according to its intent.
+
+    WRITE sessions use the primary. READ sessions use a healthy replica
+    (round-robin), or the read pool when no replica is configured. With
+    replicas, a `user_id` that committed a write within
+    READ_YOUR_WRITES_SECONDS reads from the primary instead.
+
+    A session checks out a connection at its first query, not when it is
+    opened, so requests rejected by verify_token or parameter validation
+    never touch the pool. commit() and close() return the connection, and
+    the session checks out a new one if it is used again. FastAPI closes
+    dependency sessions only after the response has been sent, so
+    handlers commit (writes) or close (reads) as soon as they have their
+    rows, and the connection is free while the response is rendered.
+    """
+    if intent == WRITE:
+        bind, target = async_engine, "primary"
+    elif user_id is not None and replica_router.wrote_recently(user_id):
+        bind, target = async_engine, "sticky"
+    else:
+        bind = replica_router.choose()
+        target = "primary" if bind is replica_router.fallback else "replica"
+    SESSIONS_ROUTED.inc(intent=intent, target=target)
+
+    async with async_session(bind=bind) as sess:
+        sess.info["target"] = target
+        if intent == WRITE and user_id is not None:
+            sess.info["write_user_id"] = user_id
+        yield sess
+
+
+def read_from_replica(sess) -> bool:
+    """
+    Whether a session opened by open_session reads from a replica.
+
+    A replica may not have applied the user's latest write yet, so its
+    results must not be cached under the generation that write started.
+    """
+    return sess.info.get("target") == "replica"
+
+
+async def get_write_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session for endpoints that write.
+    Usage in FastAPI:
+        @app.post("/todos")
+        async def create_todo(session: AsyncSession = Depends(get_write_session)):
+            ...
+    """
+    async with open_session(WRITE) as sess:
+        yield sess
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session for read-only endpoints.
+
+    Reads go to a replica when configured; on SQLite they come from the
+    reader pool, whose connections are query_only and never wait for the
+    writer.
+    """
+    async with open_session(READ) as sess:
+        yield sess
+
+
+async def get_user_write_session(
+    user_id: UUID = Depends(verify_token),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Write session for the authenticated user; its commits start read-your-writes stickiness."""
+    async with open_session(WRITE, user_id) as sess:
+        yield sess
+
+
+async def get_user_read_session(
+    user_id: UUID = Depends(verify_token),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Read session for the authenticated user, on the primary right after their writes."""
+    async with open_session(READ, user_id) as sess:
+        yield sess
+
+
 def init_db():
-    """Initialize database tables"""
+    """Initialize database tables and indexes"""
     SQLModel.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    # create_all skips tables that already exist, so add any index that was
+    # declared after the table was first created
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    install_search(engine)
+    install_counters(engine)
+    install_sync_triggers(engine)
 
 
-def close_db():
-    """Close database connection pool"""
+async def close_db():
+    """Close database connection pools"""
+    await replica_router.close()
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
     engine.dispose()
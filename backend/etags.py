@@ -0,0 +1,78 @@
+"""
+ETags and conditional requests for Phase II Todo App
+
+A todo's ETag encodes its updated_at (every write bumps it), so If-Match
+can be checked inside the UPDATE's WHERE clause with no extra query. A
+list page's ETag hashes the request parameters with each row's id and
+updated_at, which changes whenever a todo on the page is created,
+updated or deleted.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def todo_etag(updated_at: datetime) -> str:
+    """Strong ETag for a single todo version."""
+    return f'"{(updated_at - _EPOCH) // _MICROSECOND:x}"'
+
+
+def list_etag(params: Tuple, todos: Iterable) -> str:
+    """Strong ETag for a list page: its parameters plus every row's id and version."""
+    digest = hashlib.sha256(repr(params).encode())
+    for todo in todos:
+        digest.update(f"{todo.id}:{todo.updated_at.isoformat()};".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _split(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match or etag is None:
+        return False
+    tags = _split(if_none_match)
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def not_modified(headers: Mapping[str, str]) -> Response:
+    """304 carrying the headers the 200 would have had, with no body."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(headers))
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[List[datetime]]:
+    """
+    updated_at versions allowed by an If-Match header, or None when any
+    version is acceptable (no header, or "*").
+
+    Weak and unparseable tags can never match (If-Match uses strong
+    comparison), so a header made only of those yields an empty list.
+    """
+    if not if_match:
+        return None
+    versions = []
+    for tag in _split(if_match):
+        if tag == "*":
+            return None
+        if tag.startswith('"') and tag.endswith('"') and len(tag) > 2:
+            try:
+                versions.append(_EPOCH + int(tag[1:-1], 16) * _MICROSECOND)
+            except (ValueError, OverflowError):
+                continue
+    return versions
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Todo has been modified (If-Match does not match its current ETag)"
+    )
@@ -0,0 +1,289 @@
+"""
+Todo change events for Phase II Todo App
+
+Write handlers publish an event after their transaction commits, and
+GET /api/todos/stream relays the user's events to their open tabs as
+Server-Sent Events, so clients no longer need to poll.
+
+Each event is encoded into its SSE frame once and the same bytes are
+queued for every subscriber. A stream costs one small bounded queue and
+one suspended coroutine; heartbeats come from a single broker task, not
+a timer per connection. A subscriber whose queue fills up (a client that
+stopped reading) has its backlog replaced by one `resync` event, after
+which it should catch up through /api/todos/changes.
+
+Event ids are sync tokens: a client can pass the id of the last event it
+applied to /api/todos/changes as `since`. Events without an id (bulk
+changes, resync) mean "call /changes with your last token".
+
+With several workers, set EVENTS_REDIS_URL (defaults to CACHE_REDIS_URL)
+and install the optional `redis` package: events are then published to a
+Redis channel and every worker delivers them to its own subscribers.
+
+Configuration (environment):
+    EVENT_STREAMS_PER_USER: open streams allowed per user and worker (default 10)
+    EVENT_QUEUE_SIZE: undelivered events buffered per stream (default 100)
+    EVENT_HEARTBEAT_SECONDS: idle interval before a heartbeat comment (default 15)
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
+from uuid import UUID
+
+from backend.metrics import Counter, Gauge
+from backend.serialization import TODO_READ_FIELDS, dumps
+from backend.sync import encode_sync_token
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAMS_PER_USER = int(os.getenv("EVENT_STREAMS_PER_USER", "10"))
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+EVENTS_REDIS_URL = os.getenv("EVENTS_REDIS_URL") or os.getenv("CACHE_REDIS_URL")
+
+# Reconnect delay suggested to EventSource clients, in milliseconds
+RETRY_MS = 5000
+
+STREAMS_OPEN = Gauge("event_streams_open", "Open event streams in this worker")
+EVENTS_PUBLISHED = Counter("events_published_total", "Todo events published by type", ["type"])
+STREAM_OVERFLOWS = Counter(
+    "event_stream_overflows_total",
+    "Times a slow stream's backlog was dropped and replaced by a resync event",
+)
+
+HEARTBEAT = b": heartbeat\n\n"
+RESYNC = b"event: resync\ndata: {}\n\n"
+# Queued to end a stream when the broker shuts down
+_CLOSE = None
+
+# Set while publish() calls are being held back (see EventBroker.held)
+_held_events: ContextVar[Optional[List[Tuple[UUID, "Event"]]]] = ContextVar("held_events", default=None)
+
+
+class Event(NamedTuple):
+    type: str
+    frame: bytes
+
+
+def _event(event_type: str, data: Mapping, event_id: Optional[str] = None) -> Event:
+    frame = b""
+    if event_id is not None:
+        frame += f"id: {event_id}\n".encode()
+    frame += f"event: {event_type}\ndata: ".encode() + dumps(data) + b"\n\n"
+    return Event(event_type, frame)
+
+
+def stream_preamble() -> bytes:
+    """First bytes of every stream: the retry hint and an initial comment."""
+    return f"retry: {RETRY_MS}\n: connected\n\n".encode()
+
+
+def todo_event(event_type: str, todo: Mapping) -> Event:
+    """todo.created / todo.updated, carrying the todo as TodoRead JSON."""
+    return _event(
+        event_type,
+        {field: todo[field] for field in TODO_READ_FIELDS},
+        encode_sync_token(todo["seq"]),
+    )
+
+
+def todo_deleted_event(todo_id: UUID, seq: int) -> Event:
+    return _event("todo.deleted", {"id": todo_id}, encode_sync_token(seq))
+
+
+def todos_changed_event(count: int) -> Event:
+    """Many todos changed at once (bulk endpoints, import)."""
+    return _event("todos.changed", {"count": count})
+
+
+class TooManyStreams(Exception):
+    pass
+
+
+class Subscription:
+    """One open stream: a bounded queue of encoded frames."""
+
+    __slots__ = ("user_id", "queue")
+
+    def __init__(self, user_id: UUID, queue_size: int):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(queue_size)
+
+    def put(self, frame: Optional[bytes]):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # The client is not keeping up: drop its backlog rather than
+            # buffer without bound, and have it resync from /changes
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC if frame is not _CLOSE else _CLOSE)
+            STREAM_OVERFLOWS.inc()
+
+    async def frames(self):
+        """Yield frames until the broker closes the stream."""
+        while True:
+            frame = await self.queue.get()
+            if frame is _CLOSE:
+                return
+            yield frame
+
+
+class RedisFanout:
+    """Relays events between workers through a Redis pub/sub channel."""
+
+    CHANNEL = "todo:events"
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+
+    async def publish(self, user_id: UUID, frame: bytes):
+        await self._client.publish(self.CHANNEL, user_id.bytes + frame)
+
+    async def run(self, broker: "EventBroker"):
+        """Deliver channel messages to local subscribers, reconnecting on errors."""
+        while True:
+            try:
+                async with self._client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.CHANNEL)
+                    # Anything published while disconnected was missed
+                    broker.deliver_all(RESYNC)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            data = message["data"]
+                            broker.deliver(UUID(bytes=data[:16]), data[16:])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Event fan-out connection failed: %s", e)
+                await asyncio.sleep(1)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class EventBroker:
+    """In-process pub/sub of encoded events, keyed by user."""
+
+    def __init__(self, streams_per_user: int, queue_size: int, heartbeat_seconds: float,
+                 fanout: Optional[RedisFanout] = None):
+        self.streams_per_user = streams_per_user
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.fanout = fanout
+        self._subscribers: Dict[UUID, Set[Subscription]] = {}
+        self._tasks = []
+
+    def stream_count(self, user_id: UUID) -> int:
+        return len(self._subscribers.get(user_id, ()))
+
+    def subscribe(self, user_id: UUID) -> Subscription:
+        """
+        Raises:
+            TooManyStreams: If the user already has streams_per_user open
+        """
+        subscriptions = self._subscribers.setdefault(user_id, set())
+        if len(subscriptions) >= self.streams_per_user:
+            raise TooManyStreams(user_id)
+        subscription = Subscription(user_id, self.queue_size)
+        subscriptions.add(subscription)
+        STREAMS_OPEN.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscribers.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscribers[subscription.user_id]
+        STREAMS_OPEN.dec()
+
+    def deliver(self, user_id: UUID, frame: Optional[bytes]):
+        """Queue a frame for this worker's subscribers of one user."""
+        for subscription in self._subscribers.get(user_id, ()):
+            subscription.put(frame)
+
+    def deliver_all(self, frame: Optional[bytes]):
+        for subscriptions in self._subscribers.values():
+            for subscription in subscriptions:
+                subscription.put(frame)
+
+    @contextmanager
+    def held(self):
+        """
+        Collect the events published in this context instead of sending
+        them, for callers whose handlers commit before the real commit.
+        Yields the list of (user_id, event) to publish afterwards.
+        """
+        held: List[Tuple[UUID, Event]] = []
+        token = _held_events.set(held)
+        try:
+            yield held
+        finally:
+            _held_events.reset(token)
+
+    async def publish(self, user_id: UUID, event: Event):
+        """Send an event to every stream of the user. Call after the write commits."""
+        held = _held_events.get()
+        if held is not None:
+            held.append((user_id, event))
+            return
+
+        EVENTS_PUBLISHED.inc(type=event.type)
+        if self.fanout is not None:
+            try:
+                await self.fanout.publish(user_id, event.frame)
+                return
+            except Exception as e:
+                # Other workers miss this one; local streams still get it
+                logger.warning("Event fan-out publish failed: %s", e)
+        self.deliver(user_id, event.frame)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            for subscriptions in self._subscribers.values():
+                for subscription in subscriptions:
+                    # A stream with frames waiting is not idle
+                    if subscription.queue.empty():
+                        subscription.put(HEARTBEAT)
+
+    async def start(self):
+        """Start the heartbeat task (and the fan-out listener). Call on startup."""
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        if self.fanout is not None:
+            self._tasks.append(asyncio.create_task(self.fanout.run(self)))
+
+    async def close(self):
+        """End every open stream and stop background tasks."""
+        self.deliver_all(_CLOSE)
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self.fanout is not None:
+            await self.fanout.close()
+
+
+def _create_fanout() -> Optional[RedisFanout]:
+    if not EVENTS_REDIS_URL:
+        return None
+    try:
+        return RedisFanout(EVENTS_REDIS_URL)
+    except ImportError:
+        logger.warning("EVENTS_REDIS_URL is set but the redis package is not installed; events reach this worker's streams only")
+        return None
+
+
+event_broker = EventBroker(EVENT_STREAMS_PER_USER, EVENT_QUEUE_SIZE, EVENT_HEARTBEAT_SECONDS, _create_fanout())
@@ -0,0 +1,126 @@
+"""
+Bounded process pool for bcrypt password hashing in Phase II Todo App
+
+bcrypt costs 100-300 ms of CPU per call. Running it in worker processes
+keeps that work (and the GIL) away from the event loop, and bounding the
+number of pending calls turns a login storm into fast 503s instead of
+slowing every other endpoint down.
+
+Configuration (environment):
+    PASSWORD_HASH_WORKERS: worker processes (default 2, 0 = run in the threadpool)
+    PASSWORD_HASH_QUEUE_SIZE: calls allowed to wait for a worker (default 64)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+from backend.metrics import Counter, Gauge, Histogram
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64"))
+
+# Seconds clients are told to wait when the pool is saturated
+RETRY_AFTER_SECONDS = 1
+
+# Password hashing context
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time from submitting a bcrypt call to its result, including queue wait",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "bcrypt calls rejected because the hashing queue was full",
+    ["operation"],
+)
+HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "bcrypt calls running or waiting for a worker",
+)
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHashPool:
+    """Runs bcrypt in worker processes with a bounded number of pending calls."""
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_pending = max(workers, 1) + queue_size
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Start the worker processes (otherwise started on first use)."""
+        if self.workers > 0 and self._executor is None:
+            # spawn rather than fork: forking a process that runs an event
+            # loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, operation: str, function: Callable, *args):
+        if self.pending >= self.max_pending:
+            HASH_REJECTED.inc(operation=operation)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is temporarily overloaded, please retry",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            if self.workers > 0:
+                self.start()
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, function, *args)
+            return await run_in_threadpool(function, *args)
+        except BrokenProcessPool:
+            # A worker died; replace the pool so later calls can succeed
+            self.shutdown()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is temporarily unavailable, please retry",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        finally:
+            self.pending -= 1
+            HASH_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the event loop."""
+        return await self._run("hash", _hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password off the event loop."""
+        return await self._run("verify", _verify_password, plain_password, hashed_password)
+
+
+hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE)
+HASH_PENDING.set_function(lambda: hash_pool.pending)
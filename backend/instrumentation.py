@@ -0,0 +1,205 @@
+"""
+Request and database instrumentation for Phase II Todo App
+
+RequestMetricsMiddleware times every request per route template. SQLAlchemy
+cursor events attribute each query to the request that ran it (through a
+context variable), and the Timed* pool classes measure how long a request
+waited for a pooled connection. Everything is exported on /metrics.
+
+Set SLOW_REQUEST_MS to log requests slower than that many milliseconds
+together with the SQL statements they ran.
+"""
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.routing import Match
+
+from backend.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+# Longest statement text kept for the slow-request log
+MAX_LOGGED_STATEMENT_LENGTH = 500
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time per HTTP request spent executing SQL",
+    ["route"],
+)
+QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    ["engine"],
+)
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection, including opening a new one",
+    ["engine"],
+)
+
+
+class RequestStats:
+    """Database work done on behalf of one request."""
+
+    def __init__(self, capture_statements: bool):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.statements: Optional[List[Tuple[float, str]]] = [] if capture_statements else None
+
+    def record_query(self, statement: str, seconds: float):
+        self.queries += 1
+        self.db_seconds += seconds
+        if self.statements is not None:
+            self.statements.append((seconds, statement[:MAX_LOGGED_STATEMENT_LENGTH]))
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _engine_label(conn) -> str:
+    return conn.engine.pool.logging_name or "default"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    QUERY_SECONDS.observe(elapsed, engine=_engine_label(conn))
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record_query(statement, elapsed)
+
+
+def instrument_engine(engine):
+    """Time every statement run through `engine` (sync engines only; pass async_engine.sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _record_pool_wait(pool, seconds: float):
+    POOL_WAIT_SECONDS.observe(seconds, engine=pool.logging_name or "default")
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time (engine label = pool_logging_name)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_pool_wait(self, time.perf_counter() - start)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_pool_wait(self, time.perf_counter() - start)
+
+
+def _route_template(scope) -> str:
+    """Path template of the route that serves `scope`, to keep label cardinality bounded."""
+    app = scope.get("app")
+    routes = getattr(getattr(app, "router", None), "routes", ())
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware recording latency and database work per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(capture_statements=SLOW_REQUEST_MS > 0)
+        token = _request_stats.set(stats)
+        status_code = 500
+        event_stream = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, event_stream
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                event_stream = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+
+            # An event stream lasts as long as the client stays connected,
+            # which says nothing about latency
+            if not event_stream:
+                self._record(scope, status_code, elapsed, stats)
+
+    @staticmethod
+    def _record(scope, status_code: int, elapsed: float, stats: RequestStats):
+        route = _route_template(scope)
+        REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route, status=str(status_code))
+        REQUEST_QUERIES.observe(stats.queries, route=route)
+        REQUEST_DB_SECONDS.observe(stats.db_seconds, route=route)
+
+        if SLOW_REQUEST_MS > 0 and elapsed * 1000 >= SLOW_REQUEST_MS:
+            _log_slow_request(scope["method"], route, status_code, elapsed, stats)
+
+
+def _log_slow_request(method: str, route: str, status_code: int, elapsed: float, stats: RequestStats):
+    lines = [
+        f"Slow request {method} {route} -> {status_code}: {elapsed * 1000:.1f} ms, "
+        f"{stats.queries} queries, {stats.db_seconds * 1000:.1f} ms in SQL, "
+        f"{stats.pool_wait_seconds * 1000:.1f} ms waiting for a connection"
+    ]
+    for seconds, statement in stats.statements or ():
+        lines.append(f"  {seconds * 1000:8.2f} ms  {' '.join(statement.split())}")
+    logger.warning("\n".join(lines))
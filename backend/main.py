@@ -6,26 +6,37 @@ import os
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-
-from backend.db import init_db, close_db
+from fastapi.responses import PlainTextResponse
+
+from backend.admission import AdmissionControlMiddleware
+from backend.db import init_db, close_db, replica_router
+from backend.events import event_broker
+from backend.hashing import hash_pool
+from backend.instrumentation import RequestMetricsMiddleware
+from backend.metrics import render_metrics
 from backend.routes import api_router
 
 
 # Startup event
-def startup_event():
+async def startup_event():
     """
     Initialize database on startup
     """
     init_db()
+    hash_pool.start()
+    await replica_router.start()
+    await event_broker.start()
     print("Database initialized successfully")
 
 
 # Shutdown event
-def shutdown_event():
+async def shutdown_event():
     """
     Close database connection on shutdown
     """
-    close_db()
+    await event_broker.close()
+    await close_db()
+    hash_pool.shutdown()
     print("Database connection closed")
 
 
@@ -40,6 +51,9 @@ app = FastAPI(
 app.add_event_handler("startup", startup_event)
 app.add_event_handler("shutdown", shutdown_event)
 
+# Admission control; added before CORS so 503s still carry CORS headers
+app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware - Allow requests from frontend
 app.add_middleware(
     CORSMiddleware,
@@ -51,8 +65,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After"],
 )
 
+# Per-route latency and SQL query metrics, exported on /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
 # Include routes
 app.include_router(api_router)
 
@@ -64,6 +82,13 @@ async def health_check():
     return {"status": "ok", "service": "todo-api"}
 
 
+# Metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -0,0 +1,176 @@
+"""
+In-place schema upgrades for Phase II Todo App
+
+create_all() creates missing tables but never changes existing ones, so
+columns added to an existing table are added here. Every step checks
+whether it is needed first: running them on each startup is safe, and a
+database created with the current schema skips them all.
+
+Steps that rewrite existing rows leave free pages behind in a SQLite
+file. To give the space back, stop the app and run
+
+    python -m backend.migrations --vacuum
+"""
+
+import argparse
+import sys
+import uuid
+from datetime import datetime
+from typing import Set
+
+from sqlalchemy import DateTime, bindparam, inspect, text
+
+from backend.models import PRIORITY_RANK_SQL
+
+
+def _columns(conn, table: str) -> Set[str]:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def add_change_sequences(conn):
+    """users.change_seq and todos.seq for delta sync, numbering existing todos per user."""
+    if "seq" in _columns(conn, "todos"):
+        return
+
+    if "change_seq" not in _columns(conn, "users"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"))
+    conn.execute(text("ALTER TABLE todos ADD COLUMN seq INTEGER NOT NULL DEFAULT 0"))
+
+    # Existing todos get 1..n per user in write order, so a first sync can
+    # page through them like any later change
+    conn.execute(text(
+        "UPDATE todos SET seq = numbered.seq "
+        "FROM (SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY updated_at, id) AS seq "
+        "FROM todos) AS numbered "
+        "WHERE todos.id = numbered.id"
+    ))
+    conn.execute(text(
+        "UPDATE users SET change_seq = "
+        "(SELECT coalesce(max(todos.seq), 0) FROM todos WHERE todos.user_id = users.id)"
+    ))
+
+
+def add_priority_rank(conn):
+    """todos.priority_rank, computed from priority; its index replaces ix_todos_user_priority."""
+    if "priority_rank" in _columns(conn, "todos"):
+        return
+
+    # Adding a generated column fills it for existing rows. PostgreSQL
+    # rewrites the table to store it; SQLite can only add a virtual
+    # column, whose values are stored in the index instead.
+    storage = "VIRTUAL" if conn.dialect.name == "sqlite" else "STORED"
+    conn.execute(text(
+        f"ALTER TABLE todos ADD COLUMN priority_rank SMALLINT NOT NULL "
+        f"GENERATED ALWAYS AS ({PRIORITY_RANK_SQL}) {storage}"
+    ))
+    # init_db creates the new index afterwards
+    conn.execute(text("DROP INDEX IF EXISTS ix_todos_user_priority"))
+
+
+def add_tombstone_retention(conn):
+    """todo_tombstones.deleted_at and users.pruned_seq, for pruning old tombstones."""
+    if "pruned_seq" not in _columns(conn, "users"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN pruned_seq INTEGER NOT NULL DEFAULT 0"))
+    if "deleted_at" in _columns(conn, "todo_tombstones"):
+        return
+
+    column_type = "DATETIME" if conn.dialect.name == "sqlite" else "TIMESTAMP WITHOUT TIME ZONE"
+    conn.execute(text(f"ALTER TABLE todo_tombstones ADD COLUMN deleted_at {column_type}"))
+    # Existing tombstones start their retention period now
+    conn.execute(
+        text("UPDATE todo_tombstones SET deleted_at = :now").bindparams(
+            bindparam("now", datetime.utcnow(), type_=DateTime)
+        )
+    )
+    if conn.dialect.name != "sqlite":
+        # SQLite cannot add the constraint to an existing column
+        conn.execute(text("ALTER TABLE todo_tombstones ALTER COLUMN deleted_at SET NOT NULL"))
+
+
+def drop_user_id_index(conn):
+    """Drop the single-column ix_todos_user_id; every composite todos index starts with user_id."""
+    conn.execute(text("DROP INDEX IF EXISTS ix_todos_user_id"))
+
+
+# UUID columns, which SQLite databases stored as 32-character hex text
+# before CompactUUID
+UUID_COLUMNS = {
+    "users": ["id"],
+    "todos": ["id", "user_id"],
+    "todo_counters": ["user_id"],
+    "todo_tombstones": ["todo_id", "user_id"],
+}
+
+
+def _uuid_blob(value):
+    return uuid.UUID(value).bytes if isinstance(value, str) else value
+
+
+def compact_uuids(conn):
+    """
+    Convert SQLite UUID keys from hex text to the 16-byte BLOBs CompactUUID
+    stores. The columns keep their declared CHAR(32) type, which SQLite does
+    not enforce: BLOB values are stored as they are.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+
+    # Conversion is all-or-nothing, so one row shows each table's format
+    pending = {
+        table: columns for table, columns in UUID_COLUMNS.items()
+        if conn.execute(text(f"SELECT typeof({columns[0]}) FROM {table} LIMIT 1")).scalar() == "text"
+    }
+    if not pending:
+        return
+
+    conn.connection.driver_connection.create_function("uuid_blob", 1, _uuid_blob, deterministic=True)
+    # Keys and the foreign keys pointing at them are converted one table at
+    # a time, so check references once, at commit, when all of them match
+    conn.execute(text("PRAGMA defer_foreign_keys = ON"))
+    for table, columns in pending.items():
+        assignments = ", ".join(f"{column} = uuid_blob({column})" for column in columns)
+        conn.execute(text(f"UPDATE {table} SET {assignments}"))
+
+
+# Applied in order
+MIGRATIONS = [
+    add_change_sequences,
+    add_priority_rank,
+    drop_user_id_index,
+    add_tombstone_retention,
+    compact_uuids,
+]
+
+
+def run_migrations(engine):
+    """Apply every pending schema upgrade in one transaction."""
+    with engine.begin() as conn:
+        for migration in MIGRATIONS:
+            migration(conn)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Apply pending schema upgrades to DATABASE_URL")
+    parser.add_argument("--vacuum", action="store_true", help="Rebuild a SQLite file afterwards to release free pages")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # backend.db reads DATABASE_URL at import time
+    from backend.db import engine, init_db
+    from backend.search import rebuild_search_index
+
+    init_db()
+    if args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+        # VACUUM may renumber the rowids the search index keys on
+        rebuild_search_index(engine)
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,15 @@
 SQLModel database models for Phase II Todo App
 """
 
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from uuid import UUID, uuid4
 
+from sqlalchemy import Column, Computed, Index, SmallInteger
 from sqlmodel import SQLModel, Field, Relationship
 
+from backend.sqltypes import CompactUUID
+
 
 class UserBase(SQLModel):
     """Base user model for common fields"""
@@ -19,8 +22,12 @@ class User(UserBase, table=True):
     """User model for database"""
     __tablename__ = "users"
 
-    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    id: UUID = Field(default_factory=uuid4, primary_key=True, sa_type=CompactUUID)
     hashed_password: str = Field(sa_column_kwargs={"nullable": False})
+    # Last change number handed out to this user's todo writes (delta sync)
+    change_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Newest change number whose tombstone was pruned; older sync tokens expire
+    pruned_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -51,6 +58,20 @@ class Priority(str, Enum):
     HIGH = "high"
 
 
+# Sort order of priorities. todos.priority stores the enum names, which
+# sort alphabetically (HIGH, LOW, MEDIUM), so sorting uses this rank instead.
+PRIORITY_RANKS = {Priority.LOW: 1, Priority.MEDIUM: 2, Priority.HIGH: 3}
+# Rank of todos without a priority. The rank is never NULL, so a priority
+# cursor is a plain range over ix_todos_user_priority_rank.
+NO_PRIORITY_RANK = 0
+
+# SQL for todos.priority_rank, computed by the database from priority
+PRIORITY_RANK_SQL = "CASE priority {} ELSE {} END".format(
+    " ".join(f"WHEN '{priority.name}' THEN {rank}" for priority, rank in PRIORITY_RANKS.items()),
+    NO_PRIORITY_RANK,
+)
+
+
 class TodoBase(SQLModel):
     """Base todo model for common fields"""
     title: str = Field(min_length=1, max_length=500)
@@ -62,16 +83,67 @@ class TodoBase(SQLModel):
 class Todo(TodoBase, table=True):
     """Todo model for database"""
     __tablename__ = "todos"
+    __table_args__ = (
+        # One index per list_todos sort column, so any filter combination can
+        # walk the user's rows already in order. id is the keyset tie-breaker.
+        Index("ix_todos_user_created", "user_id", "created_at", "id"),
+        Index("ix_todos_user_updated", "user_id", "updated_at", "id"),
+        Index("ix_todos_user_due", "user_id", "due_date", "id"),
+        # Priority sort (ties by created_at), and priority_filter with the
+        # created_at sort
+        Index("ix_todos_user_priority_rank", "user_id", "priority_rank", "created_at", "id"),
+        Index("ix_todos_user_title", "user_id", "title", "id"),
+        # status_filter (completed/pending) with the date sorts
+        Index("ix_todos_user_completed_created", "user_id", "completed", "created_at", "id"),
+        Index("ix_todos_user_completed_updated", "user_id", "completed", "updated_at", "id"),
+        Index("ix_todos_user_completed_due", "user_id", "completed", "due_date", "id"),
+        # Delta sync: rows changed after a given seq
+        Index("ix_todos_user_seq", "user_id", "seq"),
+    )
 
-    id: UUID = Field(default_factory=uuid4, primary_key=True)
-    user_id: UUID = Field(foreign_key="users.id", index=True)
+    id: UUID = Field(default_factory=uuid4, primary_key=True, sa_type=CompactUUID)
+    user_id: UUID = Field(foreign_key="users.id", sa_type=CompactUUID)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # User change number of the last write to this todo
+    seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # PRIORITY_RANKS value of priority, kept up to date by the database.
+    # Never written by the app; the API only exposes priority.
+    priority_rank: Optional[int] = Field(
+        default=None,
+        sa_column=Column(SmallInteger, Computed(PRIORITY_RANK_SQL, persisted=True), nullable=False),
+    )
 
     # Relationship
     user: Optional[User] = Relationship(back_populates="todos")
 
 
+class TodoCounter(SQLModel, table=True):
+    """Per-user todo counters, maintained by the write handlers when enabled"""
+    __tablename__ = "todo_counters"
+
+    user_id: UUID = Field(foreign_key="users.id", primary_key=True, sa_type=CompactUUID)
+    total: int = 0
+    completed: int = 0
+    low: int = 0
+    medium: int = 0
+    high: int = 0
+
+
+class TodoTombstone(SQLModel, table=True):
+    """A deleted todo, kept so delta sync can report the deletion"""
+    __tablename__ = "todo_tombstones"
+    __table_args__ = (
+        Index("ix_todo_tombstones_user_seq", "user_id", "seq"),
+        Index("ix_todo_tombstones_deleted_at", "deleted_at"),
+    )
+
+    todo_id: UUID = Field(primary_key=True, sa_type=CompactUUID)
+    user_id: UUID = Field(foreign_key="users.id", sa_type=CompactUUID)
+    seq: int
+    deleted_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class TodoCreate(TodoBase):
     """Schema for creating a todo"""
     pass
@@ -96,3 +168,95 @@ class TodoRead(TodoBase):
 class TodoReadWithUser(TodoRead):
     """Schema for reading a todo with user info"""
     user: Optional[UserRead] = None
+
+
+# Upper bound on items per bulk request
+MAX_BULK_ITEMS = 5000
+
+
+class TodoBulkCreate(SQLModel):
+    """Schema for creating many todos in one request"""
+    items: List[TodoCreate] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class TodoBulkUpdateItem(TodoUpdate):
+    """Schema for one item of a bulk update"""
+    id: UUID
+
+
+class TodoBulkUpdate(SQLModel):
+    """Schema for updating many todos in one request"""
+    items: List[TodoBulkUpdateItem] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class TodoBulkDelete(SQLModel):
+    """Schema for deleting many todos in one request"""
+    ids: List[UUID] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class TodoBulkResult(SQLModel):
+    """Outcome of one item of a bulk request"""
+    index: int
+    id: Optional[UUID] = None
+    status: int
+    detail: Optional[str] = None
+    todo: Optional[TodoRead] = None
+
+
+class TodoBulkResponse(SQLModel):
+    """Per-item outcomes of a bulk request"""
+    succeeded: int
+    failed: int
+    results: List[TodoBulkResult]
+
+
+class TodoImportError(SQLModel):
+    """A line of an import that was not imported"""
+    line: int
+    detail: str
+
+
+class TodoImportResponse(SQLModel):
+    """Summary of a streaming import"""
+    imported: int
+    failed: int
+    errors: List[TodoImportError]
+    errors_truncated: bool = False
+    completed: bool = True
+
+
+class TodoChanges(SQLModel):
+    """Todos created, updated or deleted since a sync token"""
+    changed: List[TodoRead]
+    deleted: List[UUID]
+    next_token: str
+    has_more: bool
+
+
+# Upper bound on operations per batch request
+MAX_BATCH_OPERATIONS = 50
+
+
+class BatchOperation(SQLModel):
+    """One todo API call inside a batch"""
+    method: str = "GET"
+    path: str = Field(min_length=1)
+    headers: Dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+
+class BatchRequest(SQLModel):
+    """Schema for running several todo API calls in one request"""
+    operations: List[BatchOperation] = Field(min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class BatchOperationResult(SQLModel):
+    """Response of one batched call"""
+    status: int
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+
+
+class BatchResponse(SQLModel):
+    """Responses of a batch, in operation order"""
+    results: List[BatchOperationResult]
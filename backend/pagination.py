@@ -0,0 +1,139 @@
+"""
+Keyset (cursor) pagination helpers for Phase II Todo App
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, tuple_
+
+
+def _encode_value(value: Any) -> Any:
+    """Convert a sort key value into a JSON-safe form."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, tuple):  # Compound sort keys
+        return [_encode_value(part) for part in value]
+    if hasattr(value, "value"):  # Enum members (Priority)
+        return value.value
+    return value
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, todo_id: UUID) -> str:
+    """
+    Encode the last row of a page into an opaque cursor.
+
+    The cursor carries the sort key and id of the row, plus the sort it was
+    issued for so it cannot be replayed against a different ordering.
+    """
+    payload = {
+        "s": sort_by,
+        "o": sort_order,
+        "v": _encode_value(value),
+        "id": str(todo_id),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Optional[str], UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        The raw (JSON) sort key value and the row id
+
+    Raises:
+        HTTPException: If the cursor is malformed or was issued for another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        todo_id = UUID(payload["id"])
+        value = payload["v"]
+        issued_for = (payload["s"], payload["o"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    if issued_for != (sort_by, sort_order):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match sort_by/sort_order"
+        )
+
+    return value, todo_id
+
+
+def keyset_after(fields: Sequence, values: Sequence, descending: bool):
+    """
+    Build the WHERE clause selecting rows strictly after `values` in the
+    order of `fields`, all ordered in the same direction and never NULL.
+
+    Written as one row-value comparison, (a, b) > (:a, :b), which SQLite
+    and PostgreSQL turn into an index range even with bound parameters;
+    the equivalent a > :a OR (a = :a AND b > :b) only filters the rows the
+    index walk passes, so deep pages would cost more than the first.
+    """
+    fields, values = list(fields), list(values)
+    if len(fields) == 1:
+        return fields[0] < values[0] if descending else fields[0] > values[0]
+    left, right = tuple_(*fields), tuple(values)
+    return left < right if descending else left > right
+
+
+def keyset_condition(
+    sort_field,
+    id_field,
+    value: Any,
+    last_id: UUID,
+    descending: bool,
+    nulls_first: bool,
+    tiebreak: Optional[Tuple[Any, Any]] = None,
+) -> List:
+    """
+    Build the WHERE clauses selecting rows strictly after (value, last_id).
+
+    Rows past the cursor form one index range, or two when a nullable sort
+    column's NULL block is crossed: one through the NULL block and one
+    through the non-NULL values. Joined with OR, neither would be used to
+    seek, so each clause is returned separately for the caller to query
+    on its own and merge in order (UNION ALL).
+
+    Args:
+        sort_field: Column the page is ordered by
+        id_field: Unique tie-breaker column (ordered in the same direction)
+        value: Sort key of the last row on the previous page (may be None)
+        last_id: Id of the last row on the previous page
+        descending: Whether the page is ordered descending
+        nulls_first: Whether NULL sort keys come before non-NULL ones in
+            this scan direction (dialect dependent)
+        tiebreak: Optional (column, value) of a non-NULL column ordered
+            between sort_field and id_field, and the last row's value of it
+
+    Returns:
+        One clause per index range, in scan order
+    """
+    tie_fields, tie_values = [id_field], [last_id]
+    if tiebreak is not None:
+        tie_fields.insert(0, tiebreak[0])
+        tie_values.insert(0, tiebreak[1])
+
+    if value is None:
+        null_tail = and_(sort_field.is_(None), keyset_after(tie_fields, tie_values, descending))
+        if nulls_first:
+            # Still inside the NULL block, or past it into the non-NULL rows
+            return [null_tail, sort_field.is_not(None)]
+        return [null_tail]
+
+    conditions = [keyset_after([sort_field, *tie_fields], [value, *tie_values], descending)]
+    if sort_field.nullable and not nulls_first:
+        # NULL sort keys are the last block of the scan
+        conditions.append(sort_field.is_(None))
+    return conditions
@@ -0,0 +1,116 @@
+"""
+Read-replica routing for Phase II Todo App
+
+ReplicaRouter hands out replica engines round-robin, skipping any that
+failed their last health check, and falls back to a default read engine
+when no replica is configured or healthy. Read-your-writes stickiness is
+tracked per process: a user who just committed a write is routed to the
+primary until their window expires.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.cache import LRUCache
+from backend.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Users whose recent writes are remembered for stickiness
+STICKY_USERS_MAX = 100000
+
+SESSIONS_ROUTED = Counter(
+    "db_sessions_total",
+    "Database sessions opened by intent and target (primary, replica, sticky)",
+    ["intent", "target"],
+)
+REPLICA_HEALTHY = Gauge(
+    "db_replica_healthy",
+    "1 if the replica passed its last health check",
+    ["replica"],
+)
+
+
+class ReplicaRouter:
+    """Round-robin replica selection with background health checks."""
+
+    def __init__(self, replicas: List[AsyncEngine], fallback: AsyncEngine,
+                 health_check_interval: float, health_check_timeout: float, sticky_seconds: float):
+        self.replicas = replicas
+        self.fallback = fallback
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.sticky_seconds = sticky_seconds
+        self.healthy = {engine: True for engine in replicas}
+        self._next = itertools.count()
+        # Without replicas every read already sees the primary's commits;
+        # on SQLite the primary is the single writer connection, which
+        # sticky reads would queue behind writes
+        sticky = sticky_seconds > 0 and bool(replicas)
+        self._recent_writers = LRUCache(STICKY_USERS_MAX if sticky else 0)
+        self._task: Optional[asyncio.Task] = None
+        for engine in replicas:
+            REPLICA_HEALTHY.set(1, replica=engine.pool.logging_name)
+
+    def choose(self) -> AsyncEngine:
+        """Next healthy replica, or the fallback engine if there is none."""
+        count = len(self.replicas)
+        for _ in range(count):
+            engine = self.replicas[next(self._next) % count]
+            if self.healthy[engine]:
+                return engine
+        return self.fallback
+
+    def record_write(self, user_id: UUID):
+        """Route this user's reads to the primary for the stickiness window."""
+        self._recent_writers.set(user_id, True, time.time() + self.sticky_seconds)
+
+    def wrote_recently(self, user_id: UUID) -> bool:
+        return self._recent_writers.get(user_id) is not None
+
+    async def check(self, engine: AsyncEngine) -> bool:
+        try:
+            async with engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), self.health_check_timeout)
+            return True
+        except Exception as e:
+            logger.warning("Replica %s failed its health check: %s", engine.pool.logging_name, e)
+            return False
+
+    async def check_all(self):
+        results = await asyncio.gather(*(self.check(engine) for engine in self.replicas))
+        for engine, healthy in zip(self.replicas, results):
+            if healthy and not self.healthy[engine]:
+                logger.info("Replica %s is healthy again", engine.pool.logging_name)
+            self.healthy[engine] = healthy
+            REPLICA_HEALTHY.set(int(healthy), replica=engine.pool.logging_name)
+
+    async def _run_health_checks(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_all()
+
+    async def start(self):
+        """Start periodic health checks (no-op without replicas)."""
+        if self.replicas and self._task is None:
+            if self.sticky_seconds <= 0:
+                logger.warning(
+                    "READ_YOUR_WRITES_SECONDS is 0, so every read uses a replica "
+                    "and the response cache, which only stores primary reads, stays empty"
+                )
+            await self.check_all()
+            self._task = asyncio.create_task(self._run_health_checks())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for engine in self.replicas:
+            await engine.dispose()
@@ -0,0 +1,160 @@
+"""
+Per-user response cache for Phase II Todo App
+
+Serialized list_todos and get_todo responses are cached under
+(user_id, generation, endpoint, normalized parameters). Every todo write
+bumps the user's generation after it commits, so entries from before the
+write are never served again and simply age out of the LRU.
+
+Entries live in a per-process LRU with a TTL. When the shared cache is
+configured (CACHE_REDIS_URL), generations and entries are also kept there,
+so a write on one worker invalidates every worker. Without it, other
+workers may serve a response up to RESPONSE_CACHE_TTL_SECONDS old.
+
+Only responses read from the primary are stored. A replica may not have
+applied the write that started the current generation yet, and a stale
+response cached under it would be served for the whole TTL. With
+replicas, reads reach the primary during read-your-writes stickiness
+(READ_YOUR_WRITES_SECONDS), which is when the cache is filled. With
+replicas and READ_YOUR_WRITES_SECONDS=0 no read reaches the primary, so
+the cache is effectively off; a warning is logged at startup.
+
+Configuration (environment):
+    RESPONSE_CACHE_SIZE: cached responses per process (default 10000, 0 disables)
+    RESPONSE_CACHE_TTL_SECONDS: maximum age of a cached response (default 60)
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Hashable, Optional, Tuple
+from uuid import UUID
+
+from fastapi.responses import Response
+
+from backend.cache import LRUCache, SharedCache, shared_cache
+from backend.metrics import Counter
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "Cached-endpoint lookups by outcome (hit, shared_hit, miss)",
+    ["endpoint", "result"],
+)
+
+# Set while responses may show writes that have not committed yet
+_uncommitted: ContextVar[bool] = ContextVar("response_cache_uncommitted", default=False)
+
+
+class CachedResponse:
+    """A serialized JSON response body plus the headers that go with it."""
+
+    def __init__(self, body: bytes, headers: Dict[str, str]):
+        self.body = body
+        self.headers = headers
+
+    def to_response(self) -> Response:
+        return Response(content=self.body, media_type="application/json", headers=self.headers)
+
+    def pack(self) -> bytes:
+        return json.dumps(self.headers).encode() + b"\n" + self.body
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "CachedResponse":
+        headers, body = data.split(b"\n", 1)
+        return cls(body, json.loads(headers))
+
+
+class ResponseCache:
+    """Generation-invalidated response cache, optionally backed by a shared cache."""
+
+    def __init__(self, maxsize: int, ttl: float, shared: Optional[SharedCache] = None):
+        self.enabled = maxsize > 0 and ttl > 0
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = LRUCache(maxsize)
+        # Process-local generations come from one global counter, so a user
+        # whose generation was evicted can never get an old value back
+        self._generations = LRUCache(maxsize)
+        self._counter = itertools.count(1)
+
+    async def _generation(self, user_id: UUID) -> Hashable:
+        if self.shared is not None:
+            value = await self.shared.get(f"gen:{user_id}")
+            return int(value) if value is not None else 0
+
+        generation = self._generations.get(user_id)
+        if generation is None:
+            generation = next(self._counter)
+            self._generations.set(user_id, generation)
+        return generation
+
+    @staticmethod
+    def _shared_key(user_id: UUID, generation: Hashable, endpoint: str, params: Tuple) -> str:
+        digest = hashlib.sha256(repr(params).encode()).hexdigest()
+        return f"resp:{user_id}:{generation}:{endpoint}:{digest}"
+
+    async def get(self, user_id: UUID, endpoint: str, params: Tuple) -> Tuple[Optional[CachedResponse], Hashable]:
+        """
+        Look up a response. Also returns the generation it was looked up
+        under, which must be passed to set() so a response computed while a
+        write commits is stored under the old generation.
+        """
+        if not self.enabled:
+            return None, None
+
+        generation = await self._generation(user_id)
+        key = (user_id, generation, endpoint, params)
+        cached = self._entries.get(key)
+        if cached is not None:
+            RESPONSE_CACHE_REQUESTS.inc(endpoint=endpoint, result="hit")
+            return cached, generation
+
+        if self.shared is not None:
+            data = await self.shared.get(self._shared_key(user_id, generation, endpoint, params))
+            if data is not None:
+                cached = CachedResponse.unpack(data)
+                self._entries.set(key, cached, time.time() + self.ttl)
+                RESPONSE_CACHE_REQUESTS.inc(endpoint=endpoint, result="shared_hit")
+                return cached, generation
+
+        RESPONSE_CACHE_REQUESTS.inc(endpoint=endpoint, result="miss")
+        return None, generation
+
+    @contextmanager
+    def uncommitted(self):
+        """
+        Store nothing in this context, for callers whose handlers read
+        their own writes before the real commit: if it rolls back, a cached
+        response would keep showing them.
+        """
+        token = _uncommitted.set(True)
+        try:
+            yield
+        finally:
+            _uncommitted.reset(token)
+
+    async def set(self, user_id: UUID, endpoint: str, params: Tuple, generation: Hashable, cached: CachedResponse):
+        if not self.enabled or _uncommitted.get():
+            return
+        self._entries.set((user_id, generation, endpoint, params), cached, time.time() + self.ttl)
+        if self.shared is not None:
+            await self.shared.set(self._shared_key(user_id, generation, endpoint, params), cached.pack(), self.ttl)
+
+    async def invalidate(self, user_id: UUID):
+        """Start a new generation for the user. Call after a todo write commits."""
+        if not self.enabled:
+            return
+        if self.shared is not None:
+            await self.shared.incr(f"gen:{user_id}")
+        else:
+            self._generations.set(user_id, next(self._counter))
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SECONDS, shared_cache)
@@ -5,9 +5,11 @@ Routes package initialization
 from fastapi import APIRouter
 from backend.routes.todos import router as todos_router
 from backend.routes.auth import router as auth_router
+from backend.routes.batch import router as batch_router
 
 api_router = APIRouter()
 api_router.include_router(todos_router)
 api_router.include_router(auth_router)
+api_router.include_router(batch_router)
 
 __all__ = ["api_router"]
@@ -3,34 +3,40 @@ Authentication endpoints for Phase II Todo App
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 from backend.models import User, UserCreate, UserRead
-from backend.db import get_session
-from backend.auth import get_password_hash, create_access_token, authenticate_user
+from backend.db import get_read_session, get_write_session
+from backend.auth import create_access_token, authenticate_user
+from backend.hashing import hash_pool
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_data: UserCreate,
-    session: Session = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),
+    session: AsyncSession = Depends(get_write_session),
 ):
     """
     Register a new user.
     
     Args:
         user_data: User registration data (email, name, password)
-        session: Database session
+        read_session: Database session for the duplicate check
+        session: Database session for the insert
         
     Returns:
         Created user data (without password)
     """
-    # Check if user already exists
-    result = session.execute(select(User).where(User.email == user_data.email))
+    # Check if user already exists. This uses a read connection so the
+    # writer is not held while the password is hashed.
+    result = await read_session.execute(select(User.id).where(User.email == user_data.email))
     existing_user = result.scalars().first()
+    await read_session.close()
     
     if existing_user:
         raise HTTPException(
@@ -39,7 +45,7 @@ def register_user(
         )
     
     # Hash the password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_pool.hash(user_data.password)
     
     # Create new user
     db_user = User(
@@ -49,18 +55,31 @@ def register_user(
     )
     
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Registered concurrently since the check above
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email already registered"
+        )
     
-    # Return user data without password
-    return db_user
+    # Every column is set client-side and sessions do not expire on commit,
+    # so the response is built without reading the row back
+    return UserRead(
+        id=db_user.id,
+        email=db_user.email,
+        name=db_user.name,
+        created_at=db_user.created_at,
+        updated_at=db_user.updated_at,
+    )
 
 
 @router.post("/login")
-def login_user(
+async def login_user(
     email: str,
     password: str,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
     Login a user and return JWT token.
@@ -73,7 +92,7 @@ def login_user(
     Returns:
         JWT access token
     """
-    user = authenticate_user(email, password, session)
+    user = await authenticate_user(email, password, session)
     
     if not user:
         raise HTTPException(
@@ -0,0 +1,238 @@
+"""
+Batch endpoint for Phase II Todo App
+
+POST /api/batch runs several todo API calls in one request. The token is
+verified once and every call runs on one session: a batch of GETs on a
+read session, anything else on a write session in one transaction.
+
+Calls are dispatched to the regular todo route handlers, with their
+parameters, bodies and responses handled by FastAPI exactly as for a
+direct request; only the token and the session are supplied by the
+batch instead of being resolved again.
+"""
+
+from contextlib import nullcontext
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.dependencies.utils import solve_dependencies
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from fastapi.routing import APIRoute, run_endpoint_function, serialize_response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.routing import Match
+
+from backend.auth import verify_token
+from backend.db import READ, WRITE, get_user_read_session, get_user_write_session, open_session
+from backend.events import event_broker
+from backend.models import BatchOperation, BatchRequest, BatchResponse
+from backend.response_cache import response_cache
+from backend.routes.todos import export_todos, import_todos, router as todos_router, stream_todo_events
+from backend.serialization import dumps
+
+router = APIRouter(prefix="/api", tags=["batch"])
+
+# Streaming endpoints have no response to embed
+UNBATCHABLE_ENDPOINTS = {export_todos, import_todos, stream_todo_events}
+
+# Headers a batched call may set (credentials come from the batch itself)
+FORWARDED_HEADERS = {"if-match", "if-none-match"}
+
+# Response headers that describe the embedded body's encoding, not the call
+OMITTED_RESPONSE_HEADERS = {"content-length", "content-type"}
+
+
+class _BatchSession:
+    """
+    Session given to batched handlers. Their commit() only flushes and
+    close() does nothing: the batch commits once, after the last call.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def commit(self):
+        await self._session.flush()
+
+    async def close(self):
+        # Read handlers close early to release their connection; the batch
+        # keeps it for the next call and closes the session itself
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def _error(status_code: int, detail, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+    return status_code, dict(headers or {}), dumps({"detail": detail})
+
+
+def _match(scope: dict) -> Tuple[Optional[APIRoute], dict, bool]:
+    """The todo route for a call's scope, its path params, and whether only the method differed."""
+    method_mismatch = False
+    for route in todos_router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return route, child_scope["path_params"], False
+        if match == Match.PARTIAL:
+            method_mismatch = True
+    return None, {}, method_mismatch
+
+
+async def _call(
+    operation: BatchOperation,
+    request: Request,
+    dependency_cache: dict,
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Run one batched call and return its status, headers and JSON body."""
+    url = urlsplit(operation.path)
+    headers = []
+    for name, value in operation.headers.items():
+        if name.lower() not in FORWARDED_HEADERS:
+            continue
+        try:
+            # HTTP header values are Latin-1, as they would be on the wire
+            headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+        except UnicodeEncodeError:
+            return _error(400, f"Invalid {name} header: not Latin-1 text")
+    headers.append((b"authorization", request.headers["authorization"].encode("latin-1")))
+    scope = {
+        **request.scope,
+        "method": operation.method.upper(),
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+    }
+
+    route, path_params, method_mismatch = _match(scope)
+    if route is None:
+        if method_mismatch:
+            return _error(405, "Method Not Allowed")
+        return _error(404, "Not Found")
+    if route.endpoint in UNBATCHABLE_ENDPOINTS:
+        return _error(400, f"{route.path} cannot be called in a batch")
+
+    scope["path_params"] = path_params
+    scope["route"] = route
+    call_request = Request(scope)
+
+    try:
+        values, errors, _, sub_response, _ = await solve_dependencies(
+            request=call_request,
+            dependant=route.dependant,
+            body=operation.body,
+            dependency_overrides_provider=route.dependency_overrides_provider,
+            dependency_cache=dict(dependency_cache),
+        )
+        if errors:
+            return _error(422, jsonable_encoder(errors))
+        content = await run_endpoint_function(dependant=route.dependant, values=values, is_coroutine=True)
+    except HTTPException as e:
+        return _error(e.status_code, e.detail, e.headers)
+
+    if isinstance(content, Response):
+        status_code = content.status_code
+        response_headers = dict(content.headers)
+        body = bytes(content.body) or b"null"
+    else:
+        status_code = sub_response.status_code or route.status_code or 200
+        response_headers = dict(sub_response.headers)
+        if content is None and route.response_field is None:
+            body = b"null"
+        else:
+            body = dumps(await serialize_response(
+                field=route.response_field,
+                response_content=content,
+                include=route.response_model_include,
+                exclude=route.response_model_exclude,
+                by_alias=route.response_model_by_alias,
+                exclude_unset=route.response_model_exclude_unset,
+                exclude_defaults=route.response_model_exclude_defaults,
+                exclude_none=route.response_model_exclude_none,
+            ))
+        if status_code == 204:
+            body = b"null"
+
+    headers = {
+        name: value for name, value in response_headers.items()
+        if name.lower() not in OMITTED_RESPONSE_HEADERS
+    }
+    return status_code, headers, body
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    user_id: UUID = Depends(verify_token),
+):
+    """
+    Run up to MAX_BATCH_OPERATIONS todo API calls in one request.
+
+    Each operation is {"method", "path", "headers", "body"}, e.g.
+    {"method": "GET", "path": "/api/todos?status_filter=pending&limit=20"}.
+    Only If-Match and If-None-Match are taken from `headers`; the batch's
+    own token authorizes every call. Calls run in order, so later calls
+    see earlier writes.
+
+    A batch of GETs runs on one read session. Otherwise all calls share one
+    write transaction, committed after the last call; each writing call
+    runs in a savepoint, so a call that fails leaves no partial changes
+    while the others still apply.
+
+    Returns one {"status", "headers", "body"} per operation, with the
+    status code and body the call would have had on its own. Export,
+    import and the event stream cannot be batched.
+
+    **Security**: Every call acts as the authenticated user
+    """
+    writes = any(operation.method.upper() != "GET" for operation in batch.operations)
+
+    results = []
+    async with open_session(WRITE if writes else READ, user_id) as session:
+        batch_session = _BatchSession(session)
+        # Pre-solved dependencies: handlers get these instead of verifying
+        # the token again or opening sessions of their own
+        dependency_cache = {
+            (verify_token, ()): user_id,
+            (get_user_read_session, ()): batch_session,
+            (get_user_write_session, ()): batch_session,
+        }
+
+        # A write batch's reads see its uncommitted writes, so they are
+        # not cached in case the batch rolls back
+        uncommitted = response_cache.uncommitted() if writes else nullcontext()
+        with event_broker.held() as held_events, uncommitted:
+            wrote = False
+            for operation in batch.operations:
+                if operation.method.upper() == "GET":
+                    results.append(await _call(operation, request, dependency_cache))
+                    continue
+
+                savepoint = await session.begin_nested()
+                result = await _call(operation, request, dependency_cache)
+                if result[0] < 400:
+                    await savepoint.commit()
+                    wrote = True
+                else:
+                    await savepoint.rollback()
+                results.append(result)
+
+            if writes:
+                await session.commit()
+
+        # Handlers invalidated before the real commit; do it again now
+        # that the changes are visible, then send their events
+        if wrote:
+            await response_cache.invalidate(user_id)
+        for event_user_id, event in held_events:
+            await event_broker.publish(event_user_id, event)
+
+    body = b",".join(
+        b'{"status":%d,"headers":%s,"body":%s}' % (status_code, dumps(headers), payload)
+        for status_code, headers, payload in results
+    )
+    return Response(content=b'{"results":[' + body + b"]}", media_type="application/json")
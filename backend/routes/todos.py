@@ -2,70 +2,304 @@
 Todo endpoints for Phase II Todo App
 """
 
-from typing import List, Optional
-from uuid import UUID
+from typing import List, Optional, Sequence
+from uuid import UUID, uuid4
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
-from sqlalchemy.sql import text
-
-from backend.models import Todo, TodoCreate, TodoUpdate, TodoRead, User, Priority
-from backend.db import get_session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy import bindparam, delete, false, insert, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+
+from backend.models import (
+    Todo,
+    TodoCreate,
+    TodoUpdate,
+    TodoRead,
+    TodoBulkCreate,
+    TodoBulkUpdate,
+    TodoBulkDelete,
+    TodoBulkResult,
+    TodoBulkResponse,
+    TodoChanges,
+    TodoImportError,
+    TodoImportResponse,
+    User,
+    Priority,
+    PRIORITY_RANKS,
+    NO_PRIORITY_RANK,
+)
+from backend.db import async_engine, get_user_read_session, get_user_write_session, read_from_replica
 from backend.auth import verify_token
+from backend.etags import (
+    etag_matches,
+    list_etag,
+    not_modified,
+    parse_if_match,
+    precondition_failed,
+    todo_etag,
+)
+from backend.events import (
+    TooManyStreams,
+    event_broker,
+    stream_preamble,
+    todo_deleted_event,
+    todo_event,
+    todos_changed_event,
+)
+from backend.pagination import decode_cursor, encode_cursor, keyset_after, keyset_condition
+from backend.response_cache import CachedResponse, response_cache
+from backend.search import apply_search
+from backend.serialization import TODO_READ_COLUMNS, dumps, render_todo, render_todos
+from backend.stats import (
+    get_stats,
+    record_created,
+    record_delete,
+    record_update,
+    refresh_user_counters,
+)
+from backend.sync import (
+    DEFAULT_CHANGES_LIMIT,
+    MAX_CHANGES_LIMIT,
+    allocate_seqs,
+    decode_sync_token,
+    delete_todo_row,
+    get_changes,
+    record_tombstones,
+    take_seq,
+)
+from backend.transfer import (
+    EXPORT_FORMATS,
+    IMPORT_BATCH_SIZE,
+    MAX_IMPORT_BATCH_SIZE,
+    MAX_IMPORT_ERRORS,
+    ImportStopped,
+    parse_import,
+    stream_export,
+)
 
 router = APIRouter(prefix="/api/todos", tags=["todos"])
 
 
 @router.post("", response_model=TodoRead, status_code=status.HTTP_201_CREATED)
-def create_todo(
+async def create_todo(
     todo: TodoCreate,
+    response: Response,
     user_id: UUID = Depends(verify_token),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_user_write_session),
 ):
     """
     Create a new todo for the authenticated user.
 
     **Security**: User can only create todos for themselves (user_id from token)
     """
-    # Verify user exists
-    result = session.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
+    # Taking a change number also checks that the user still exists
+    seq = await take_seq(session, user_id)
+
+    now = datetime.utcnow()
+    values = {
+        "id": uuid4(),
+        "user_id": user_id,
+        **todo.model_dump(),
+        "created_at": now,
+        "updated_at": now,
+        "seq": seq,
+    }
 
-    if not user:
+    table = Todo.__table__
+    try:
+        result = await session.execute(insert(table).values(values).returning(*table.c))
+    except IntegrityError:
+        # The change number is taken in the INSERT, and is NULL for a
+        # missing user
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    db_todo = result.mappings().one()
 
-    # Create todo
-    db_todo = Todo(
-        user_id=user_id,
-        title=todo.title,
-        completed=todo.completed,
-        due_date=todo.due_date,
-        priority=todo.priority
-    )
-
-    session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
+    await record_created(session, user_id, [values])
+    await session.commit()
+    await response_cache.invalidate(user_id)
+    await event_broker.publish(user_id, todo_event("todo.created", db_todo))
 
+    response.headers["ETag"] = todo_etag(db_todo["updated_at"])
     return db_todo
 
 
+# Columns list_todos can order by; anything else falls back to created_at
+SORT_FIELDS = {
+    "created_at": Todo.created_at,
+    "updated_at": Todo.updated_at,
+    "due_date": Todo.due_date,
+    "priority": Todo.priority_rank,
+    "title": Todo.title,
+}
+
+# Priority ties are ordered by created_at, following ix_todos_user_priority_rank
+PRIORITY_TIEBREAK = Todo.created_at
+
+DIALECT_NAME = async_engine.dialect.name
+
+# SQLite sorts NULLs below every value, PostgreSQL above
+NULLS_SORT_LOW = DIALECT_NAME == "sqlite"
+
+
+def _priority_rank(value: str) -> Optional[int]:
+    """Rank of a priority given by value ("high") or name ("HIGH"); None if unknown."""
+    try:
+        priority = Priority(value)
+    except ValueError:
+        priority = Priority.__members__.get(value)
+    return PRIORITY_RANKS.get(priority)
+
+
+def _cursor_value(sort_by: str, row):
+    """Sort key of a list_todos row, as stored in its cursor."""
+    if sort_by == "priority":
+        rank = PRIORITY_RANKS.get(row.priority, NO_PRIORITY_RANK)
+        return (rank, getattr(row, PRIORITY_TIEBREAK.key))
+    return getattr(row, sort_by)
+
+
+def _parse_sort_value(sort_by: str, raw):
+    """Convert a cursor's JSON sort key back to the column's Python type."""
+    if raw is None and sort_by != "priority":
+        return None
+    try:
+        if sort_by == "priority":
+            # (rank, created_at)
+            rank, tie_value = raw
+            if not isinstance(rank, int) or isinstance(rank, bool):
+                raise ValueError(rank)
+            return rank, datetime.fromisoformat(tie_value)
+        if sort_by == "title":
+            return str(raw)
+        return datetime.fromisoformat(raw)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def build_todo_list_query(
+    user_id: UUID,
+    status_filter: Optional[str] = None,
+    priority_filter: Optional[str] = None,
+    search: Optional[str] = None,
+    sort_by: str = "created_at",
+    sort_order: str = "desc",
+    cursor: Optional[str] = None,
+    columns: Optional[Sequence] = None,
+):
+    """
+    Build the filtered, ordered SELECT used by list_todos (without LIMIT/OFFSET).
+
+    Selects Todo entities, or just `columns` when given.
+
+    Rows are ordered by the sort column and then by id, so every page
+    boundary is unambiguous and a cursor can resume exactly after it.
+    sort_by="relevance" orders search matches best first; it falls back to
+    newest first when the search cannot be ranked and does not support cursors.
+    """
+    query = select(*columns) if columns else select(Todo)
+    query = query.where(Todo.user_id == user_id)
+
+    # Apply status filter
+    if status_filter == "completed":
+        query = query.where(Todo.completed == True)
+    elif status_filter == "pending":
+        query = query.where(Todo.completed == False)
+
+    # Apply priority filter
+    if priority_filter:
+        rank = _priority_rank(priority_filter)
+        query = query.where(Todo.priority_rank == rank if rank is not None else false())
+
+    # Apply search filter
+    rank_order = None
+    if search:
+        query, rank_order = apply_search(query, search, DIALECT_NAME)
+
+    if sort_by == "relevance":
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not supported for relevance sort"
+            )
+        if rank_order is not None:
+            return query.order_by(rank_order, Todo.id.desc())
+        return query.order_by(Todo.created_at.desc(), Todo.id.desc())
+
+    # Apply sorting
+    if sort_by not in SORT_FIELDS:
+        sort_by = "created_at"
+    sort_field = SORT_FIELDS[sort_by]
+    descending = sort_order != "asc"
+    order_fields = [sort_field, Todo.id]
+    if sort_by == "priority":
+        order_fields.insert(1, PRIORITY_TIEBREAK)
+
+    # Resume after the cursor's row
+    if cursor:
+        raw_value, last_id = decode_cursor(cursor, sort_by, "desc" if descending else "asc")
+        value = _parse_sort_value(sort_by, raw_value)
+        tiebreak = None
+        if sort_by == "priority":
+            value, tie_value = value
+            tiebreak = (PRIORITY_TIEBREAK, tie_value)
+        if sort_by == "priority" and priority_filter:
+            # Priority is pinned by the filter, so the tie-breakers alone order the page
+            conditions = [keyset_after([PRIORITY_TIEBREAK, Todo.id], [tie_value, last_id], descending)]
+        else:
+            conditions = keyset_condition(
+                sort_field,
+                Todo.id,
+                value,
+                last_id,
+                descending=descending,
+                nulls_first=descending != NULLS_SORT_LOW,
+                tiebreak=tiebreak,
+            )
+
+        if len(conditions) == 1:
+            query = query.where(conditions[0])
+        else:
+            # Rows past the cursor lie on both sides of due_date's NULL
+            # block: each range is queried so it seeks its own part of the
+            # index, and the UNION ALL merges them in page order
+            merged = union_all(*(query.where(condition) for condition in conditions)).subquery()
+            if columns:
+                query = select(*(merged.c[column.key] for column in columns))
+            else:
+                query = select(aliased(Todo, merged))
+            order_fields = [merged.c[field.key] for field in order_fields]
+
+    if descending:
+        query = query.order_by(*(field.desc() for field in order_fields))
+    else:
+        query = query.order_by(*(field.asc() for field in order_fields))
+
+    return query
+
+
 @router.get("", response_model=List[TodoRead])
-def list_todos(
+async def list_todos(
     user_id: UUID = Depends(verify_token),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_user_read_session),
     status_filter: str = None,
     priority_filter: str = None,
     search: str = None,
-    sort_by: str = "created_at",
+    sort_by: str = None,
     sort_order: str = "desc",
     offset: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Get all todos for the authenticated user with advanced filtering and pagination.
@@ -75,75 +309,564 @@ def list_todos(
     Query Parameters:
     - status_filter: Filter by status - "all" (default), "completed", or "pending"
     - priority_filter: Filter by priority - "low", "medium", "high"
-    - search: Search in todo titles
-    - sort_by: Sort by "created_at", "updated_at", "due_date", "priority", "title"
+    - search: Search in todo titles (substring match, served by a full-text index)
+    - sort_by: Sort by "created_at", "updated_at", "due_date", "priority"
+      (low < medium < high, then created_at), "title", or "relevance"
+      (default when search is given, otherwise "created_at")
     - sort_order: Sort order "asc" or "desc"
-    - offset: Pagination offset
-    - limit: Page size (max 100)
+    - offset: Pagination offset (ignored when cursor is given)
+    - limit: Page size (1 to 100; values outside are clamped)
+    - cursor: Opaque cursor from a previous page's X-Next-Cursor header
+
+    When more rows follow, the X-Next-Cursor response header carries the
+    cursor for the next page. Cursor pages cost the same at any depth,
+    unlike offset pages.
+
+    Responses are served from the per-user response cache until the
+    user's next write. Each page has an ETag; a matching If-None-Match
+    gets 304 Not Modified.
     """
     # Validate limit
     if limit > 100:
         limit = 100
+    elif limit < 1:
+        limit = 1
+
+    if sort_by is None and search:
+        sort_by = "relevance"
+    elif sort_by != "relevance" and sort_by not in SORT_FIELDS:
+        sort_by = "created_at"
+    if sort_order != "asc":
+        sort_order = "desc"
+    if status_filter not in ("completed", "pending"):
+        status_filter = None
+    if cursor:
+        offset = 0
+
+    params = (status_filter, priority_filter, search, sort_by, sort_order, offset, limit, cursor)
+    cached, generation = await response_cache.get(user_id, "list_todos", params)
+    if cached is not None:
+        if etag_matches(if_none_match, cached.headers.get("ETag")):
+            return not_modified(cached.headers)
+        return cached.to_response()
+
+    query = build_todo_list_query(
+        user_id,
+        status_filter=status_filter,
+        priority_filter=priority_filter,
+        search=search,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        cursor=cursor,
+        columns=TODO_READ_COLUMNS,
+    )
 
-    query = select(Todo).where(Todo.user_id == user_id)
+    # Apply pagination, fetching one extra row to know whether a next page exists
+    if not cursor:
+        query = query.offset(offset)
+    query = query.limit(limit + 1)
 
-    # Apply status filter
-    if status_filter == "completed":
-        query = query.where(Todo.completed == True)
-    elif status_filter == "pending":
-        query = query.where(Todo.completed == False)
+    result = await session.execute(query)
+    todos = result.all()
+    # Hand the connection back now rather than after the response is sent
+    await session.close()
 
-    # Apply priority filter
-    if priority_filter:
-        query = query.where(Todo.priority == priority_filter)
+    headers = {}
+    if len(todos) > limit:
+        todos = todos[:limit]
+        if todos and sort_by != "relevance":
+            last = todos[-1]
+            headers["X-Next-Cursor"] = encode_cursor(
+                sort_by, sort_order, _cursor_value(sort_by, last), last.id
+            )
+    headers["ETag"] = list_etag(params, todos)
 
-    # Apply search filter
-    if search:
-        query = query.where(func.lower(Todo.title).contains(func.lower(search)))
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
 
-    # Apply sorting
-    if sort_by == "due_date":
-        sort_field = Todo.due_date
-    elif sort_by == "priority":
-        sort_field = Todo.priority
-    elif sort_by == "title":
-        sort_field = Todo.title
-    elif sort_by == "updated_at":
-        sort_field = Todo.updated_at
-    else:  # default to created_at
-        sort_field = Todo.created_at
-
-    if sort_order == "asc":
-        query = query.order_by(sort_field.asc())
+    # Rows come straight from the todos table, so they skip response_model
+    # validation and are rendered by the fast serializer
+    cached = CachedResponse(render_todos(todos), headers)
+    if not read_from_replica(session):
+        await response_cache.set(user_id, "list_todos", params, generation, cached)
+    return cached.to_response()
+
+
+# Rows per multi-row statement, well under SQLite's bound-parameter limit
+BULK_CHUNK_SIZE = 500
+
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def _require_user(session: AsyncSession, user_id: UUID):
+    """Raise 404 if the token's user no longer exists."""
+    result = await session.execute(select(User.id).where(User.id == user_id))
+    if result.first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+
+@router.post("/bulk", response_model=TodoBulkResponse, status_code=status.HTTP_201_CREATED)
+async def bulk_create_todos(
+    payload: TodoBulkCreate,
+    user_id: UUID = Depends(verify_token),
+    session: AsyncSession = Depends(get_user_write_session),
+):
+    """
+    Create up to MAX_BULK_ITEMS todos with multi-row INSERTs in one transaction.
+
+    **Security**: All todos are created for the authenticated user
+    """
+    first_seq = await allocate_seqs(session, user_id, len(payload.items))
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            **item.model_dump(),
+            "created_at": now,
+            "updated_at": now,
+            "seq": first_seq + i,
+        }
+        for i, item in enumerate(payload.items)
+    ]
+
+    for chunk in _chunks(rows):
+        await session.execute(insert(Todo.__table__).values(chunk))
+    await record_created(session, user_id, rows)
+    await session.commit()
+    await response_cache.invalidate(user_id)
+    await event_broker.publish(user_id, todos_changed_event(len(rows)))
+
+    results = [
+        TodoBulkResult(index=i, id=row["id"], status=status.HTTP_201_CREATED, todo=TodoRead(**row))
+        for i, row in enumerate(rows)
+    ]
+    return TodoBulkResponse(succeeded=len(results), failed=0, results=results)
+
+
+@router.patch("/bulk", response_model=TodoBulkResponse)
+async def bulk_update_todos(
+    payload: TodoBulkUpdate,
+    user_id: UUID = Depends(verify_token),
+    session: AsyncSession = Depends(get_user_write_session),
+):
+    """
+    Update many todos in one transaction.
+
+    Items that set the same fields share one executemany UPDATE. As with
+    PUT /{todo_id}, fields that are omitted or null are left unchanged.
+
+    **Security**: Only the authenticated user's todos are updated; other ids report 404
+    """
+    ids = list({item.id for item in payload.items})
+    owned = set()
+    for chunk in _chunks(ids):
+        result = await session.execute(
+            select(Todo.id).where(Todo.user_id == user_id, Todo.id.in_(chunk))
+        )
+        owned.update(result.scalars().all())
+
+    # Group parameter sets by the columns they change
+    now = datetime.utcnow()
+    groups = {}
+    for item in payload.items:
+        if item.id not in owned:
+            continue
+        changes = item.model_dump(exclude={"id"}, exclude_none=True)
+        if not changes:
+            continue
+        groups.setdefault(tuple(sorted(changes)), []).append(
+            {"b_id": item.id, **{f"b_{field}": value for field, value in changes.items()}}
+        )
+
+    changed = sum(len(params) for params in groups.values())
+    if changed:
+        seq = await allocate_seqs(session, user_id, changed)
+        for params in groups.values():
+            for param in params:
+                param["b_seq"] = seq
+                seq += 1
+
+    table = Todo.__table__
+    for fields, params in groups.items():
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.user_id == user_id)
+            .values({
+                **{field: bindparam(f"b_{field}") for field in fields},
+                "updated_at": now,
+                "seq": bindparam("b_seq"),
+            })
+        )
+        for chunk in _chunks(params):
+            await session.execute(stmt, chunk)
+
+    if groups:
+        await refresh_user_counters(session, user_id)
+
+    todos = {}
+    if owned:
+        for chunk in _chunks(list(owned)):
+            result = await session.execute(
+                select(Todo).where(Todo.user_id == user_id, Todo.id.in_(chunk))
+            )
+            todos.update((todo.id, todo) for todo in result.scalars().all())
+    await session.commit()
+    await response_cache.invalidate(user_id)
+    if changed:
+        await event_broker.publish(user_id, todos_changed_event(changed))
+
+    results = []
+    for i, item in enumerate(payload.items):
+        if item.id in owned:
+            results.append(TodoBulkResult(
+                index=i, id=item.id, status=status.HTTP_200_OK,
+                todo=TodoRead.model_validate(todos[item.id]),
+            ))
+        else:
+            results.append(TodoBulkResult(
+                index=i, id=item.id, status=status.HTTP_404_NOT_FOUND, detail="Todo not found",
+            ))
+
+    succeeded = sum(1 for r in results if r.status == status.HTTP_200_OK)
+    return TodoBulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
+@router.delete("/bulk", response_model=TodoBulkResponse)
+async def bulk_delete_todos(
+    payload: TodoBulkDelete,
+    user_id: UUID = Depends(verify_token),
+    session: AsyncSession = Depends(get_user_write_session),
+):
+    """
+    Delete many todos with DELETE ... RETURNING in one transaction.
+
+    **Security**: Only the authenticated user's todos are deleted; other ids report 404
+    """
+    ids = list(set(payload.ids))
+    first_seq = await allocate_seqs(session, user_id, len(ids))
+
+    table = Todo.__table__
+    deleted = set()
+    for chunk in _chunks(ids):
+        result = await session.execute(
+            delete(table)
+            .where(table.c.user_id == user_id, table.c.id.in_(chunk))
+            .returning(table.c.id)
+        )
+        deleted.update(result.scalars().all())
+
+    if deleted:
+        await record_tombstones(session, user_id, deleted, first_seq)
+        await refresh_user_counters(session, user_id)
+    await session.commit()
+    await response_cache.invalidate(user_id)
+    if deleted:
+        await event_broker.publish(user_id, todos_changed_event(len(deleted)))
+
+    results = []
+    seen = set()
+    for i, todo_id in enumerate(payload.ids):
+        if todo_id in deleted and todo_id not in seen:
+            seen.add(todo_id)
+            results.append(TodoBulkResult(index=i, id=todo_id, status=status.HTTP_204_NO_CONTENT))
+        else:
+            results.append(TodoBulkResult(
+                index=i, id=todo_id, status=status.HTTP_404_NOT_FOUND, detail="Todo not found",
+            ))
+
+    return TodoBulkResponse(succeeded=len(seen), failed=len(results) - len(seen), results=results)
+
+
+@router.get("/export")
+async def export_todos(
+    user_id: UUID = Depends(verify_token),
+    export_format: str = Query("ndjson", alias="format"),
+    gzip: bool = False,
+):
+    """
+    Download every todo the user owns, oldest first.
+
+    Rows are streamed from a single query, so the export is one consistent
+    snapshot and memory stays flat regardless of size. Declared before
+    /{todo_id} so the path is not captured as a todo id.
+
+    Query Parameters:
+    - format: "ndjson" (default; one todo object per line) or "csv"
+    - gzip: Compress the download (served as a .gz file)
+
+    **Security**: Users can only export their own todos
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format, use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    media_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"todos.{extension}"
+    if gzip:
+        media_type, filename = "application/gzip", filename + ".gz"
+
+    return StreamingResponse(
+        stream_export(user_id, export_format, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def _copy_todos(session: AsyncSession, rows: List[dict]):
+    """COPY rows into todos with asyncpg's binary copy protocol."""
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    columns = list(rows[0])
+    await raw.driver_connection.copy_records_to_table(
+        Todo.__tablename__,
+        columns=columns,
+        # The priority column stores enum names
+        records=[
+            tuple(value.name if isinstance(value, Priority) else value for value in row.values())
+            for row in rows
+        ],
+    )
+
+
+async def _insert_import_batch(session: AsyncSession, user_id: UUID, rows: List[dict]):
+    """Insert one import batch in its own transaction."""
+    # On PostgreSQL this also opens the transaction the COPY joins
+    first_seq = await allocate_seqs(session, user_id, len(rows))
+    for i, row in enumerate(rows):
+        row["seq"] = first_seq + i
+
+    await record_created(session, user_id, rows)
+    if DIALECT_NAME == "postgresql":
+        await _copy_todos(session, rows)
     else:
-        query = query.order_by(sort_field.desc())
+        for chunk in _chunks(rows):
+            await session.execute(insert(Todo.__table__).values(chunk))
+    await session.commit()
+
 
-    # Apply pagination
-    query = query.offset(offset).limit(limit)
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'value'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+@router.post("/import", response_model=TodoImportResponse)
+async def import_todos(
+    request: Request,
+    user_id: UUID = Depends(verify_token),
+    session: AsyncSession = Depends(get_user_write_session),
+    import_format: Optional[str] = Query(None, alias="format"),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=MAX_IMPORT_BATCH_SIZE),
+):
+    """
+    Create todos from an NDJSON or CSV request body.
+
+    The body is parsed as it arrives and never held in memory. Each record
+    is validated like POST /api/todos; valid records are inserted in
+    batches of `batch_size`, one transaction per batch (COPY on
+    PostgreSQL), so records before a failure stay imported. Files from
+    /export can be imported as they are.
+
+    Query Parameters:
+    - format: "ndjson" or "csv" (default: csv for a text/csv body, otherwise ndjson)
+    - batch_size: Rows per insert batch
+
+    Returns counts and the line numbers of rejected records. `completed`
+    is false if the upload could not be read to the end.
+
+    **Security**: All todos are created for the authenticated user
+    """
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = "csv" if content_type.startswith("text/csv") else "ndjson"
+    if import_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported import format, use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    await _require_user(session, user_id)
+    await session.commit()
+
+    summary = TodoImportResponse(imported=0, failed=0, errors=[])
+
+    def reject(line: int, detail: str):
+        summary.failed += 1
+        if len(summary.errors) < MAX_IMPORT_ERRORS:
+            summary.errors.append(TodoImportError(line=line, detail=detail))
+        else:
+            summary.errors_truncated = True
+
+    batch = []
+
+    async def flush():
+        await _insert_import_batch(session, user_id, batch)
+        summary.imported += len(batch)
+        batch.clear()
+
+    try:
+        try:
+            async for line, values, error in parse_import(request.stream(), import_format):
+                if error is None:
+                    try:
+                        todo = TodoCreate.model_validate(values)
+                    except ValidationError as e:
+                        error = _validation_detail(e)
+                if error is not None:
+                    reject(line, error)
+                    continue
+
+                now = datetime.utcnow()
+                batch.append({
+                    "id": uuid4(),
+                    "user_id": user_id,
+                    **todo.model_dump(),
+                    "created_at": now,
+                    "updated_at": now,
+                })
+                if len(batch) >= batch_size:
+                    await flush()
+        except ImportStopped as e:
+            reject(e.line, e.detail)
+            summary.completed = False
+        if batch:
+            await flush()
+    finally:
+        # Batches are committed as they go, so invalidate and notify even if a later one failed
+        if summary.imported:
+            await response_cache.invalidate(user_id)
+            await event_broker.publish(user_id, todos_changed_event(summary.imported))
+
+    return summary
+
+
+@router.get("/stream")
+async def stream_todo_events(user_id: UUID = Depends(verify_token)):
+    """
+    Server-Sent Events feed of the user's todo changes, instead of polling.
+
+    Events: todo.created and todo.updated (data: the todo), todo.deleted
+    (data: {"id": ...}), todos.changed after bulk writes and imports, and
+    resync when events had to be dropped. After the last two, fetch
+    /api/todos/changes. Event ids are sync tokens for /changes. Heartbeat
+    comments keep idle connections open.
+
+    The stream takes no database session, so it holds no connection.
+    Returns 429 when the user already has EVENT_STREAMS_PER_USER streams
+    open on this worker.
+
+    **Security**: Only the authenticated user's events are sent
+    """
+    try:
+        subscription = event_broker.subscribe(user_id)
+    except TooManyStreams:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many open event streams"
+        )
+
+    async def frames():
+        try:
+            yield stream_preamble()
+            async for frame in subscription.frames():
+                yield frame
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/changes", response_model=TodoChanges)
+async def get_todo_changes(
+    user_id: UUID = Depends(verify_token),
+    session: AsyncSession = Depends(get_user_read_session),
+    since: Optional[str] = Query(None, description="next_token from the previous sync"),
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT),
+):
+    """
+    Todos created, updated or deleted since a sync token.
+
+    Without `since` every todo is returned. Store `next_token` and pass it
+    as `since` next time; while `has_more` is true, call again right away.
+    A todo changed several times appears once, with its current values.
+    A token older than the pruned deletions gets 410 Gone: sync again
+    without `since`.
+
+    **Security**: Only the authenticated user's changes are returned
+    """
+    since_seq, full = decode_sync_token(since) if since is not None else (None, True)
+    changes = await get_changes(session, user_id, since_seq, limit, full)
+    await session.close()
+    return Response(content=dumps(changes), media_type="application/json")
+
+
+@router.get("/stats", response_model=dict)
+async def get_todo_stats(
+    user_id: UUID = Depends(verify_token),
+    session: AsyncSession = Depends(get_user_read_session),
+):
+    """
+    Get todo statistics for the user.
 
-    result = session.execute(query)
-    todos = result.scalars().all()
+    Computed in SQL (or read from the per-user counters when
+    TODO_STATS_COUNTERS is enabled) instead of loading every todo.
+    Declared before /{todo_id} so the path is not captured as a todo id.
 
-    return todos
+    Returns:
+    - total: Total number of todos
+    - completed: Number of completed todos
+    - pending: Number of pending todos
+    - by_priority: Count of todos by priority
+    - overdue: Number of overdue todos
+    """
+    stats = await get_stats(session, user_id)
+    await session.close()
+    return stats
 
 
 @router.get("/{todo_id}", response_model=TodoRead)
-def get_todo(
+async def get_todo(
     todo_id: UUID,
     user_id: UUID = Depends(verify_token),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_user_read_session),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Get a specific todo by ID.
 
+    The ETag header identifies this version of the todo; a matching
+    If-None-Match gets 304 Not Modified.
+
     **Security**: User can only access their own todos
     """
-    result = session.execute(
-        select(Todo).where(
+    cached, generation = await response_cache.get(user_id, "get_todo", (todo_id,))
+    if cached is not None:
+        if etag_matches(if_none_match, cached.headers.get("ETag")):
+            return not_modified(cached.headers)
+        return cached.to_response()
+
+    result = await session.execute(
+        select(*TODO_READ_COLUMNS).where(
             (Todo.id == todo_id) & (Todo.user_id == user_id)
         )
     )
-    todo = result.scalars().first()
+    todo = result.first()
+    await session.close()
 
     if not todo:
         raise HTTPException(
@@ -151,125 +874,108 @@ def get_todo(
             detail="Todo not found"
         )
 
-    return todo
+    headers = {"ETag": todo_etag(todo.updated_at)}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
+
+    cached = CachedResponse(render_todo(todo), headers)
+    if not read_from_replica(session):
+        await response_cache.set(user_id, "get_todo", (todo_id,), generation, cached)
+    return cached.to_response()
 
 
 @router.put("/{todo_id}", response_model=TodoRead)
-def update_todo(
+async def update_todo(
     todo_id: UUID,
     todo_update: TodoUpdate,
+    response: Response,
     user_id: UUID = Depends(verify_token),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_user_write_session),
+    if_match: Optional[str] = Header(None),
 ):
     """
     Update a todo (title, completed status, due date, and/or priority).
 
+    Every update bumps updated_at and so the todo's ETag. Send the ETag
+    from a previous read as If-Match to get 412 Precondition Failed
+    instead of overwriting someone else's change.
+
     **Security**: User can only update their own todos
     """
-    result = session.execute(
-        select(Todo).where(
-            (Todo.id == todo_id) & (Todo.user_id == user_id)
+    table = Todo.__table__
+    changes = todo_update.model_dump(exclude_none=True)
+
+    conditions = [table.c.id == todo_id, table.c.user_id == user_id]
+    versions = parse_if_match(if_match)
+    if versions is not None:
+        conditions.append(table.c.updated_at.in_(versions))
+
+    if not changes:
+        stmt = select(*table.c).where(*conditions)
+    else:
+        seq = await take_seq(session, user_id)
+        # Counters read the row's old values, so they are updated before it changes
+        await record_update(
+            session,
+            user_id,
+            todo_id,
+            todo_update.model_dump(include={"completed", "priority"}, exclude_none=True),
         )
-    )
-    db_todo = result.scalars().first()
+        stmt = (
+            update(table)
+            .where(*conditions)
+            .values(**changes, updated_at=datetime.utcnow(), seq=seq)
+            .returning(*table.c)
+        )
+
+    result = await session.execute(stmt)
+    db_todo = result.mappings().first()
 
     if not db_todo:
+        # Only a failed If-Match needs a second query to tell 412 from 404
+        if versions is not None:
+            result = await session.execute(
+                select(table.c.id).where(table.c.id == todo_id, table.c.user_id == user_id)
+            )
+            if result.first() is not None:
+                raise precondition_failed()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Todo not found"
         )
 
-    # Update fields if provided
-    if todo_update.title is not None:
-        db_todo.title = todo_update.title
-
-    if todo_update.completed is not None:
-        db_todo.completed = todo_update.completed
-
-    if todo_update.due_date is not None:
-        db_todo.due_date = todo_update.due_date
-
-    if todo_update.priority is not None:
-        db_todo.priority = todo_update.priority
-
-    session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
+    await session.commit()
+    await response_cache.invalidate(user_id)
+    if changes:
+        await event_broker.publish(user_id, todo_event("todo.updated", db_todo))
 
+    response.headers["ETag"] = todo_etag(db_todo["updated_at"])
     return db_todo
 
 
 @router.delete("/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_todo(
+async def delete_todo(
     todo_id: UUID,
     user_id: UUID = Depends(verify_token),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_user_write_session),
 ):
     """
     Delete a todo.
 
     **Security**: User can only delete their own todos
     """
-    result = session.execute(
-        select(Todo).where(
-            (Todo.id == todo_id) & (Todo.user_id == user_id)
-        )
-    )
-    db_todo = result.scalars().first()
+    seq = await take_seq(session, user_id)
+    await record_delete(session, user_id, todo_id)
+    seq = await delete_todo_row(session, user_id, todo_id, seq)
 
-    if not db_todo:
+    if seq is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Todo not found"
         )
 
-    session.delete(db_todo)
-    session.commit()
+    await session.commit()
+    await response_cache.invalidate(user_id)
+    await event_broker.publish(user_id, todo_deleted_event(todo_id, seq))
 
     return None
-
-
-@router.get("/stats", response_model=dict)
-def get_todo_stats(
-    user_id: UUID = Depends(verify_token),
-    session: Session = Depends(get_session),
-):
-    """
-    Get todo statistics for the user.
-
-    Returns:
-    - total: Total number of todos
-    - completed: Number of completed todos
-    - pending: Number of pending todos
-    - by_priority: Count of todos by priority
-    - overdue: Number of overdue todos
-    """
-    result = session.execute(
-        select(Todo).where(Todo.user_id == user_id)
-    )
-    todos = result.scalars().all()
-
-    total = len(todos)
-    completed = sum(1 for t in todos if t.completed)
-    pending = total - completed
-    
-    # Count by priority
-    low_count = sum(1 for t in todos if t.priority == Priority.LOW)
-    medium_count = sum(1 for t in todos if t.priority == Priority.MEDIUM)
-    high_count = sum(1 for t in todos if t.priority == Priority.HIGH)
-    
-    # Count overdue todos
-    now = datetime.utcnow()
-    overdue = sum(1 for t in todos if not t.completed and t.due_date and t.due_date < now)
-
-    return {
-        "total": total,
-        "completed": completed,
-        "pending": pending,
-        "by_priority": {
-            "low": low_count,
-            "medium": medium_count,
-            "high": high_count
-        },
-        "overdue": overdue
-    }
@@ -0,0 +1,136 @@
+"""
+Full-text search over todo titles for Phase II Todo App
+
+SQLite uses an FTS5 table with the trigram tokenizer, kept in sync with
+`todos` by triggers. PostgreSQL uses a pg_trgm GIN index on `todos.title`.
+Both keep the substring semantics of the original LIKE search and rank
+matches by relevance.
+"""
+
+import logging
+
+from sqlalchemy import column, func, literal_column, table
+from sqlalchemy.exc import DBAPIError
+
+from backend.models import Todo
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "todos_fts"
+
+# Trigram indexes can only match search terms of at least three characters
+MIN_INDEXED_TERM_LENGTH = 3
+
+# Set by install_search once the index for the dialect exists
+_sqlite_fts_ready = False
+_pg_trgm_ready = False
+
+_SQLITE_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, content='todos', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON todos BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.rowid, new.title);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON todos BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.rowid, old.title);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title ON todos BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) VALUES ('delete', old.rowid, old.title);
+        INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.rowid, new.title);
+    END
+    """,
+]
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_todos_title_trgm ON todos USING gin (title gin_trgm_ops)",
+]
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+
+def install_search(engine):
+    """
+    Create the search index for the engine's dialect.
+
+    On SQLite a missing FTS table is created and filled from existing rows.
+    If FTS5 or the trigram tokenizer is unavailable, search falls back to
+    the unindexed LIKE scan.
+    """
+    global _sqlite_fts_ready, _pg_trgm_ready
+
+    if engine.dialect.name == "sqlite":
+        try:
+            with engine.begin() as conn:
+                exists = conn.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                    (FTS_TABLE,),
+                ).first()
+                if not exists:
+                    for ddl in _SQLITE_FTS_DDL:
+                        conn.exec_driver_sql(ddl)
+                    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+                else:
+                    for ddl in _SQLITE_FTS_DDL[1:]:
+                        conn.exec_driver_sql(ddl)
+            _sqlite_fts_ready = True
+        except DBAPIError as e:
+            logger.warning("SQLite FTS5 trigram search unavailable, using LIKE scans: %s", e)
+            _sqlite_fts_ready = False
+
+    elif engine.dialect.name == "postgresql":
+        try:
+            with engine.begin() as conn:
+                for ddl in _POSTGRES_DDL:
+                    conn.exec_driver_sql(ddl)
+            _pg_trgm_ready = True
+        except DBAPIError as e:
+            logger.warning("pg_trgm search index unavailable, using unindexed ILIKE: %s", e)
+            _pg_trgm_ready = False
+
+
+def rebuild_search_index(engine):
+    """
+    Rebuild the SQLite FTS table from `todos`.
+
+    Needed after VACUUM, which may renumber the rowids the FTS table keys on.
+    """
+    if engine.dialect.name == "sqlite" and _sqlite_fts_ready:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_search(query, search: str, dialect_name: str):
+    """
+    Restrict a Todo SELECT to titles containing `search`.
+
+    Returns:
+        (query, order_by) where order_by sorts the matches best first, or
+        None when the backend cannot rank this search
+    """
+    if dialect_name == "postgresql" and _pg_trgm_ready:
+        query = query.where(Todo.title.ilike(f"%{_escape_like(search)}%", escape="\\"))
+        return query, func.similarity(Todo.title, search).desc()
+
+    if dialect_name == "sqlite" and _sqlite_fts_ready and len(search) >= MIN_INDEXED_TERM_LENGTH:
+        phrase = '"' + search.replace('"', '""') + '"'
+        query = query.join(_fts, _fts.c.rowid == literal_column("todos.rowid")).where(
+            literal_column(FTS_TABLE).op("MATCH")(phrase)
+        )
+        # FTS5 rank is bm25(), where lower is more relevant
+        return query, _fts.c.rank.asc()
+
+    query = query.where(Todo.title.ilike(f"%{_escape_like(search)}%", escape="\\"))
+    return query, None
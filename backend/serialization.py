@@ -0,0 +1,68 @@
+"""
+Fast JSON rendering for Phase II Todo App
+
+FastAPI validates every returned row against the response_model and then
+walks the result with jsonable_encoder before json.dumps. For rows that
+come straight from the todos table that work is redundant, so routes can
+opt in to selecting TODO_READ_COLUMNS as plain rows and rendering them
+here instead.
+
+The output is byte-for-byte what FastAPI's default JSONResponse produces
+for the same TodoRead data: keys in model field order, naive datetimes
+in isoformat(), UUIDs and enums as strings, UTF-8 without ASCII escaping,
+no whitespace. orjson does this natively; without it, json.dumps with
+the same options is used.
+"""
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable, Sequence
+from uuid import UUID
+
+from backend.models import Todo, TodoRead
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Field names in TodoRead order, and the todos columns that produce them
+TODO_READ_FIELDS = tuple(TodoRead.model_fields)
+TODO_READ_COLUMNS = tuple(Todo.__table__.c[name] for name in TODO_READ_FIELDS)
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize dicts/lists of JSON-native values, UUIDs, datetimes and enums."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def todo_dict(row: Sequence) -> dict:
+    """A row selected as TODO_READ_COLUMNS, as a TodoRead-shaped dict."""
+    return dict(zip(TODO_READ_FIELDS, row))
+
+
+def render_todo(row: Sequence) -> bytes:
+    return dumps(todo_dict(row))
+
+
+def render_todos(rows: Iterable[Sequence]) -> bytes:
+    return dumps([dict(zip(TODO_READ_FIELDS, row)) for row in rows])
@@ -0,0 +1,60 @@
+"""
+Column types for Phase II Todo App
+"""
+
+import uuid
+from typing import Any, Optional
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy.types import TypeDecorator
+
+
+class CompactUUID(TypeDecorator):
+    """
+    UUID column stored as PostgreSQL's native uuid, elsewhere as a 16-byte
+    BLOB.
+
+    SQLModel's default UUID type stores 32-character hex text outside
+    PostgreSQL, twice the size of the value, in the table and in every
+    index that includes the column. Values go in and come out as
+    uuid.UUID either way; 16-byte BLOBs compare in the same order as the
+    hex text did, so keyset cursors are unaffected.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PostgresUUID())
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value: Any, dialect) -> Any:
+        if value is None:
+            return value
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(value)
+        if dialect.name == "postgresql":
+            return str(value)
+        return value.bytes
+
+    def literal_processor(self, dialect):
+        # For statements compiled with literal_binds. Overridden
+        # rather than process_literal_param: LargeBinary would render the
+        # bytes as a text literal, which never equals a BLOB.
+        def process(value: Any) -> str:
+            if not isinstance(value, uuid.UUID):
+                value = uuid.UUID(value)
+            if dialect.name == "postgresql":
+                return f"'{value}'"
+            return f"X'{value.hex}'"
+
+        return process
+
+    def process_result_value(self, value: Any, dialect) -> Optional[uuid.UUID]:
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, (bytes, memoryview)):
+            return uuid.UUID(bytes=bytes(value))
+        return uuid.UUID(value)
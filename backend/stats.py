@@ -0,0 +1,226 @@
+"""
+Todo statistics for Phase II Todo App
+
+Stats are computed with a single conditional-aggregate query. When
+TODO_STATS_COUNTERS is enabled, per-user counters in `todo_counters` are
+updated in the same transaction as every todo write, and a stats call
+becomes one primary-key lookup (plus an indexed overdue count).
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Mapping
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import Priority, Todo, TodoCounter
+
+STATS_COUNTERS_ENABLED = os.getenv("TODO_STATS_COUNTERS", "").lower() in ("1", "true", "yes")
+
+# Counter column for each priority
+PRIORITY_COUNTERS = {
+    Priority.LOW: "low",
+    Priority.MEDIUM: "medium",
+    Priority.HIGH: "high",
+}
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _aggregate_columns():
+    """Counter columns computed from the todos table, in TodoCounter order."""
+    return [
+        func.count(Todo.id).label("total"),
+        _count_if(Todo.completed == True).label("completed"),
+        _count_if(Todo.priority == Priority.LOW).label("low"),
+        _count_if(Todo.priority == Priority.MEDIUM).label("medium"),
+        _count_if(Todo.priority == Priority.HIGH).label("high"),
+    ]
+
+
+def _overdue_condition(now: datetime):
+    return (Todo.completed == False) & (Todo.due_date < now)
+
+
+def _stats_response(row: Mapping) -> Dict:
+    total = row["total"] or 0
+    completed = row["completed"] or 0
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "by_priority": {
+            "low": row["low"] or 0,
+            "medium": row["medium"] or 0,
+            "high": row["high"] or 0,
+        },
+        "overdue": row["overdue"] or 0,
+    }
+
+
+async def get_stats(session: AsyncSession, user_id: UUID) -> Dict:
+    """Return the stats payload for a user in one round trip."""
+    now = datetime.utcnow()
+
+    if STATS_COUNTERS_ENABLED:
+        overdue = (
+            select(func.count(Todo.id))
+            .where(Todo.user_id == user_id, _overdue_condition(now))
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            select(
+                TodoCounter.total,
+                TodoCounter.completed,
+                TodoCounter.low,
+                TodoCounter.medium,
+                TodoCounter.high,
+                overdue.label("overdue"),
+            ).where(TodoCounter.user_id == user_id)
+        )
+        row = result.mappings().first()
+        if row is None:
+            row = {"total": 0, "completed": 0, "low": 0, "medium": 0, "high": 0, "overdue": 0}
+        return _stats_response(row)
+
+    result = await session.execute(
+        select(
+            *_aggregate_columns(),
+            _count_if(_overdue_condition(now)).label("overdue"),
+        ).where(Todo.user_id == user_id)
+    )
+    return _stats_response(result.mappings().one())
+
+
+def _upsert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(TodoCounter)
+
+
+def _delta_for(todo: Mapping) -> Dict[str, int]:
+    """Counter increments contributed by one todo's values."""
+    delta = {"total": 1, "completed": int(bool(todo.get("completed")))}
+    for priority, column in PRIORITY_COUNTERS.items():
+        delta[column] = int(todo.get("priority") == priority)
+    return delta
+
+
+async def record_created(session: AsyncSession, user_id: UUID, todos: Iterable[Mapping]):
+    """Add newly inserted todos (as column-value mappings) to the user's counters."""
+    if not STATS_COUNTERS_ENABLED:
+        return
+
+    totals = {"total": 0, "completed": 0, "low": 0, "medium": 0, "high": 0}
+    for todo in todos:
+        for column, value in _delta_for(todo).items():
+            totals[column] += value
+    if not totals["total"]:
+        return
+
+    stmt = _upsert(session.bind.dialect.name).values(user_id=user_id, **totals)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TodoCounter.user_id],
+        set_={column: getattr(TodoCounter, column) + value for column, value in totals.items()},
+    )
+    await session.execute(stmt)
+
+
+def _old_value(todo_id: UUID, user_id: UUID, expression):
+    """Scalar subquery reading `expression` from the todo row before it changes."""
+    return (
+        select(expression)
+        .where(Todo.id == todo_id, Todo.user_id == user_id)
+        .scalar_subquery()
+    )
+
+
+async def record_update(session: AsyncSession, user_id: UUID, todo_id: UUID, changes: Mapping):
+    """
+    Apply the counter changes of an upcoming todo UPDATE.
+
+    Must run before the UPDATE: the old values are read inside the same
+    statement, so no extra round trip is needed to fetch them.
+    """
+    if not STATS_COUNTERS_ENABLED:
+        return
+
+    values = {}
+    if "completed" in changes:
+        new = int(bool(changes["completed"]))
+        old = _old_value(todo_id, user_id, case((Todo.completed == True, 1), else_=0))
+        values["completed"] = TodoCounter.completed + new - func.coalesce(old, new)
+    if "priority" in changes:
+        for priority, column in PRIORITY_COUNTERS.items():
+            new = int(changes["priority"] == priority)
+            old = _old_value(todo_id, user_id, case((Todo.priority == priority, 1), else_=0))
+            values[column] = getattr(TodoCounter, column) + new - func.coalesce(old, new)
+    if not values:
+        return
+
+    await session.execute(
+        update(TodoCounter).where(TodoCounter.user_id == user_id).values(**values)
+    )
+
+
+async def record_delete(session: AsyncSession, user_id: UUID, todo_id: UUID):
+    """Remove a todo from the counters. Must run before the DELETE."""
+    if not STATS_COUNTERS_ENABLED:
+        return
+
+    values = {
+        "total": TodoCounter.total - _old_value(todo_id, user_id, func.count(Todo.id)),
+        "completed": TodoCounter.completed - func.coalesce(
+            _old_value(todo_id, user_id, case((Todo.completed == True, 1), else_=0)), 0
+        ),
+    }
+    for priority, column in PRIORITY_COUNTERS.items():
+        values[column] = getattr(TodoCounter, column) - func.coalesce(
+            _old_value(todo_id, user_id, case((Todo.priority == priority, 1), else_=0)), 0
+        )
+
+    await session.execute(
+        update(TodoCounter).where(TodoCounter.user_id == user_id).values(**values)
+    )
+
+
+async def refresh_user_counters(session: AsyncSession, user_id: UUID):
+    """Recompute one user's counters from the todos table (used after bulk writes)."""
+    if not STATS_COUNTERS_ENABLED:
+        return
+
+    result = await session.execute(select(*_aggregate_columns()).where(Todo.user_id == user_id))
+    totals = dict(result.mappings().one())
+
+    stmt = _upsert(session.bind.dialect.name).values(user_id=user_id, **totals)
+    stmt = stmt.on_conflict_do_update(index_elements=[TodoCounter.user_id], set_=totals)
+    await session.execute(stmt)
+
+
+def install_counters(engine):
+    """
+    Prepare the counters table at startup.
+
+    When counters are enabled and the table is empty, it is rebuilt from
+    the todos table. When they are disabled, the table is emptied so stale
+    rows cannot be served after counters are switched back on.
+    """
+    with engine.begin() as conn:
+        if not STATS_COUNTERS_ENABLED:
+            conn.execute(delete(TodoCounter))
+            return
+
+        if conn.execute(select(TodoCounter.user_id).limit(1)).first() is not None:
+            return
+
+        aggregate = select(Todo.user_id, *_aggregate_columns()).group_by(Todo.user_id)
+        columns = ["user_id", "total", "completed", "low", "medium", "high"]
+        stmt = _upsert(engine.dialect.name).from_select(columns, aggregate)
+        stmt = stmt.on_conflict_do_nothing(index_elements=[TodoCounter.user_id])
+        conn.execute(stmt)
@@ -0,0 +1,352 @@
+"""
+Delta sync for Phase II Todo App
+
+Every todo write takes the next number from its user's change_seq counter
+and stores it in the todo's seq column; a delete stores it in a tombstone
+row instead. A sync token is the last number a client has seen, so "what
+changed since" is a range scan of the (user_id, seq) indexes on todos and
+todo_tombstones and costs O(changes), not O(todos).
+
+Taking a number updates the user's row, which locks it until the
+transaction ends (SQLite serializes all writers anyway). A user's changes
+therefore commit in seq order, and a client can never see seq n before
+a smaller number that commits later. Write handlers take their numbers
+before touching any todo, so the user row is always the first lock.
+
+Single-todo writes (create, update, delete) take their number inside the
+write statement, so each stays one round trip. On PostgreSQL a
+data-modifying CTE (next_seq_cte) advances the counter. SQLite has no
+data-modifying CTEs: the statement reads change_seq + 1, and triggers on
+todos and todo_tombstones advance the counter to the number written.
+Bulk writes and imports reserve their numbers first with allocate_seqs.
+Tombstones older than TOMBSTONE_RETENTION_DAYS are deleted by
+prune_tombstones. Run it periodically, e.g. daily from cron:
+
+    python -m backend.sync --prune-tombstones
+
+Each user's pruned_seq records the newest change number pruned. A sync
+token older than that could miss deletions, so /changes answers it with
+410 Gone, and the client syncs again without a token. The pages of that
+first sync carry tokens marked as resuming it, which need no tombstones
+and so never expire.
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, exists, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import Todo, TodoTombstone, User
+from backend.serialization import TODO_READ_COLUMNS, todo_dict
+from backend.stats import STATS_COUNTERS_ENABLED
+
+# Most changes returned by one /changes call
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 5000
+
+# Age after which prune_tombstones deletes a tombstone
+TOMBSTONE_RETENTION_DAYS = float(os.getenv("TOMBSTONE_RETENTION_DAYS", "90"))
+
+
+async def allocate_seqs(session: AsyncSession, user_id: UUID, count: int = 1) -> int:
+    """
+    Reserve `count` consecutive change numbers for the user and return
+    the first. Numbers of a transaction that rolls back are simply skipped.
+
+    Raises:
+        HTTPException: 404 if the user no longer exists
+    """
+    users = User.__table__
+    result = await session.execute(
+        update(users)
+        .where(users.c.id == user_id)
+        .values(change_seq=users.c.change_seq + count)
+        .returning(users.c.change_seq)
+    )
+    last = result.scalar_one_or_none()
+    if last is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return last - count + 1
+
+
+def next_seq_cte(user_id: UUID):
+    """
+    Data-modifying CTE (PostgreSQL) that takes the user's next change
+    number, for a statement that writes one todo. Its change_seq column is
+    the number, or no row if the user no longer exists.
+    """
+    users = User.__table__
+    return (
+        update(users)
+        .where(users.c.id == user_id)
+        .values(change_seq=users.c.change_seq + 1)
+        .returning(users.c.change_seq)
+        .cte("next_seq")
+    )
+
+
+def _seq_in_statement(session: AsyncSession) -> bool:
+    """
+    Whether a single-todo write takes its number inside its own statement.
+    On PostgreSQL not with the stats counters: their UPDATE runs before
+    the write and must not lock before the user row does.
+    """
+    if session.bind.dialect.name == "postgresql":
+        return not STATS_COUNTERS_ENABLED
+    return True
+
+
+async def take_seq(session: AsyncSession, user_id: UUID):
+    """
+    The change number for a single-todo write, as a value for its
+    statement's seq column: an expression taking the number within that
+    statement, which is NULL (rejected by the NOT NULL column) if the user
+    no longer exists. With counters on PostgreSQL, the number itself,
+    taken first with allocate_seqs.
+
+    Raises:
+        HTTPException: 404 if the user no longer exists (when taken first)
+    """
+    if not _seq_in_statement(session):
+        return await allocate_seqs(session, user_id)
+    if session.bind.dialect.name == "postgresql":
+        return select(next_seq_cte(user_id).c.change_seq).scalar_subquery()
+    # The triggers from install_sync_triggers advance change_seq to it
+    users = User.__table__
+    return select(users.c.change_seq + 1).where(users.c.id == user_id).scalar_subquery()
+
+
+async def delete_todo_row(session: AsyncSession, user_id: UUID, todo_id: UUID, seq) -> Optional[int]:
+    """
+    Delete one todo and record its tombstone under `seq`, from take_seq.
+    Returns the deletion's change number, or None if the user has no such
+    todo.
+    """
+    todos, tombstones = Todo.__table__, TodoTombstone.__table__
+    if not _seq_in_statement(session):
+        result = await session.execute(
+            delete(todos)
+            .where(todos.c.id == todo_id, todos.c.user_id == user_id)
+            .returning(todos.c.id)
+        )
+        if result.first() is None:
+            return None
+        await record_tombstones(session, user_id, [todo_id], seq)
+        return seq
+
+    deleted_at = literal(datetime.utcnow())
+    if session.bind.dialect.name == "postgresql":
+        # Take the number, delete the row and insert its tombstone. The
+        # DELETE's condition waits for the number, so the user row is
+        # locked before the todo row.
+        deleted = (
+            delete(todos)
+            .where(todos.c.id == todo_id, todos.c.user_id == user_id, seq.is_not(None))
+            .returning(todos.c.id, todos.c.user_id)
+            .cte("deleted")
+        )
+        tombstone = select(deleted.c.id, deleted.c.user_id, seq, deleted_at)
+    else:
+        # Inserting the tombstone deletes the todo (todo_tombstones_ai)
+        tombstone = (
+            select(todos.c.id, todos.c.user_id, seq, deleted_at)
+            .where(todos.c.id == todo_id, todos.c.user_id == user_id)
+        )
+
+    result = await session.execute(
+        insert(tombstones)
+        .from_select(["todo_id", "user_id", "seq", "deleted_at"], tombstone)
+        .returning(tombstones.c.seq)
+    )
+    return result.scalar_one_or_none()
+
+
+async def record_tombstones(session: AsyncSession, user_id: UUID, todo_ids: Iterable[UUID], first_seq: int):
+    """Record deleted todos, numbered from first_seq (allocated before the DELETE)."""
+    now = datetime.utcnow()
+    rows = [
+        {"todo_id": todo_id, "user_id": user_id, "seq": first_seq + i, "deleted_at": now}
+        for i, todo_id in enumerate(todo_ids)
+    ]
+    if rows:
+        await session.execute(insert(TodoTombstone.__table__), rows)
+
+
+# Keep users.change_seq at the newest number written to the user's todos
+# and tombstones, for the single-todo writes that take change_seq + 1 on
+# SQLite. Writes numbered by allocate_seqs leave it unchanged. A tombstone
+# also deletes its todo, so deleting a todo is one INSERT.
+_SQLITE_SYNC_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS todos_change_seq_ai AFTER INSERT ON todos BEGIN
+        UPDATE users SET change_seq = new.seq WHERE id = new.user_id AND change_seq < new.seq;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todos_change_seq_au AFTER UPDATE OF seq ON todos BEGIN
+        UPDATE users SET change_seq = new.seq WHERE id = new.user_id AND change_seq < new.seq;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_tombstones_ai AFTER INSERT ON todo_tombstones BEGIN
+        UPDATE users SET change_seq = new.seq WHERE id = new.user_id AND change_seq < new.seq;
+        DELETE FROM todos WHERE id = new.todo_id;
+    END
+    """,
+]
+
+
+def install_sync_triggers(engine):
+    """Create the SQLite triggers that maintain users.change_seq."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        for ddl in _SQLITE_SYNC_DDL:
+            conn.exec_driver_sql(ddl)
+
+
+def encode_sync_token(seq: int, full: bool = False) -> str:
+    """`full` marks a token that resumes an unfinished first sync."""
+    token = {"seq": seq, "full": True} if full else {"seq": seq}
+    raw = json.dumps(token, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> Tuple[int, bool]:
+    """
+    Returns:
+        The token's change number, and whether it resumes a first sync
+
+    Raises:
+        HTTPException: If the token is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        decoded = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        seq, full = decoded["seq"], decoded.get("full", False)
+        if not isinstance(seq, int) or seq < 0 or not isinstance(full, bool):
+            raise ValueError(seq)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+    return seq, full
+
+
+async def get_changes(session: AsyncSession, user_id: UUID, since: Optional[int], limit: int,
+                      full: bool = False) -> Dict:
+    """
+    Todos changed and deleted after `since`, oldest change first, at most
+    `limit` of them. Without `since`, or with `full` (a first sync and its
+    later pages), every todo is returned and tombstones are skipped, since
+    the client has nothing to delete. The token that ends a first sync is
+    at least the user's pruned_seq, so it does not expire right away.
+
+    Raises:
+        HTTPException: 410 if tombstones after `since` were pruned
+    """
+    full = full or since is None
+    result = await session.execute(select(User.pruned_seq).where(User.id == user_id))
+    pruned_seq = result.scalar() or 0
+    if not full and since < pruned_seq:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token expired; sync again without one"
+        )
+
+    todo_query = select(*TODO_READ_COLUMNS, Todo.seq).where(Todo.user_id == user_id)
+    if since is not None:
+        todo_query = todo_query.where(Todo.seq > since)
+    result = await session.execute(todo_query.order_by(Todo.seq).limit(limit + 1))
+    changes: List = [(row.seq, todo_dict(row), None) for row in result.all()]
+
+    if not full:
+        result = await session.execute(
+            select(TodoTombstone.seq, TodoTombstone.todo_id)
+            .where(TodoTombstone.user_id == user_id, TodoTombstone.seq > since)
+            .order_by(TodoTombstone.seq)
+            .limit(limit + 1)
+        )
+        changes.extend((row.seq, None, row.todo_id) for row in result.all())
+
+    changes.sort(key=lambda change: change[0])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    if changes:
+        next_seq = changes[-1][0]
+    else:
+        next_seq = since or 0
+    if full and not has_more:
+        next_seq = max(next_seq, pruned_seq)
+    return {
+        "changed": [todo for _, todo, _ in changes if todo is not None],
+        "deleted": [todo_id for _, _, todo_id in changes if todo_id is not None],
+        "next_token": encode_sync_token(next_seq, full=full and has_more),
+        "has_more": has_more,
+    }
+
+
+def prune_tombstones(engine, retention_days: float = TOMBSTONE_RETENTION_DAYS) -> int:
+    """
+    Delete tombstones older than retention_days, in one transaction, and
+    return how many were deleted.
+
+    Each affected user's pruned_seq is first raised to their newest
+    expired tombstone, and everything up to it is deleted, so every
+    tombstone after pruned_seq is still present.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    users, tombstones = User.__table__, TodoTombstone.__table__
+    expired = (tombstones.c.user_id == users.c.id) & (tombstones.c.deleted_at < cutoff)
+
+    with engine.begin() as conn:
+        conn.execute(
+            update(users)
+            .where(exists(select(tombstones.c.seq).where(expired)))
+            .values(pruned_seq=select(func.max(tombstones.c.seq)).where(expired).scalar_subquery())
+        )
+        result = conn.execute(
+            delete(tombstones).where(
+                tombstones.c.seq <= select(users.c.pruned_seq).where(users.c.id == tombstones.c.user_id).scalar_subquery()
+            )
+        )
+    return result.rowcount
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Delta sync maintenance for DATABASE_URL")
+    parser.add_argument(
+        "--prune-tombstones", action="store_true",
+        help=f"Delete tombstones older than TOMBSTONE_RETENTION_DAYS ({TOMBSTONE_RETENTION_DAYS:g})",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # backend.db reads DATABASE_URL at import time
+    from backend.db import engine, init_db
+
+    init_db()
+    if args.prune_tombstones:
+        print(f"Pruned {prune_tombstones(engine)} tombstones")
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
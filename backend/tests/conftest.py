@@ -0,0 +1,48 @@
+"""
+Shared fixtures for the Phase II Todo App tests
+
+backend.db reads DATABASE_URL at import time, so every test session runs
+against a fresh SQLite file that is set before the app is imported.
+"""
+
+import os
+import tempfile
+from uuid import uuid4
+
+import pytest
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='todo-tests-'), 'test.db')}"
+# Hash passwords inline; the tests do not need a process pool
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.main import app  # noqa: E402
+
+PASSWORD = "test-password"
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def register(client) -> dict:
+    """Register a new user and return their Authorization headers."""
+    email = f"{uuid4().hex}@example.com"
+    response = client.post("/api/auth/register", json={"email": email, "name": "Test", "password": PASSWORD})
+    assert response.status_code == 201
+    response = client.post("/api/auth/login", params={"email": email, "password": PASSWORD})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def auth_headers(client):
+    return register(client)
+
+
+def import_csv(client, headers, body: str):
+    response = client.post("/api/todos/import", params={"format": "csv"}, content=body.encode(), headers=headers)
+    assert response.status_code == 200
+    return response.json()
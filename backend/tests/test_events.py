@@ -0,0 +1,30 @@
+"""
+Event stream limits
+"""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from backend.events import event_broker
+from backend.routes.todos import stream_todo_events
+
+
+def test_streams_over_the_cap_get_429():
+    async def scenario():
+        user_id = uuid4()
+        # Open every stream before any of them starts, as racing requests would
+        streams = [await stream_todo_events(user_id) for _ in range(event_broker.streams_per_user)]
+        with pytest.raises(HTTPException) as excinfo:
+            await stream_todo_events(user_id)
+        assert excinfo.value.status_code == 429
+        assert event_broker.stream_count(user_id) == event_broker.streams_per_user
+
+        for stream in streams:
+            await stream.body_iterator.__anext__()
+            await stream.body_iterator.aclose()
+        assert event_broker.stream_count(user_id) == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+"""
+list_todos page sizes and keyset pagination
+"""
+
+import pytest
+
+from backend.tests.conftest import import_csv
+
+
+def seed(client, headers, count: int):
+    rows = "".join(f"todo {i},false\n" for i in range(count))
+    assert import_csv(client, headers, "title,completed\n" + rows)["imported"] == count
+
+
+def walk(client, headers, **params):
+    """Every page of a listing, following X-Next-Cursor."""
+    todos, cursor = [], None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        response = client.get("/api/todos", params=query, headers=headers)
+        assert response.status_code == 200
+        todos.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return todos
+
+
+@pytest.mark.parametrize("limit", [0, -5])
+def test_limit_below_one_is_clamped(client, auth_headers, limit):
+    seed(client, auth_headers, 3)
+    response = client.get("/api/todos", params={"limit": limit}, headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" in response.headers
+
+
+def test_limit_one_pages_through_everything(client, auth_headers):
+    seed(client, auth_headers, 3)
+    todos = walk(client, auth_headers, limit=1)
+    assert sorted(todo["title"] for todo in todos) == ["todo 0", "todo 1", "todo 2"]
+
+
+def test_limit_at_and_above_maximum(client, auth_headers):
+    seed(client, auth_headers, 105)
+    for limit in (100, 500):
+        response = client.get("/api/todos", params={"limit": limit}, headers=auth_headers)
+        assert len(response.json()) == 100
+        assert "X-Next-Cursor" in response.headers
+    assert len(walk(client, auth_headers, limit=100)) == 105
+
+
+def test_empty_listing_has_no_cursor(client, auth_headers):
+    response = client.get("/api/todos", params={"limit": 0}, headers=auth_headers)
+    assert response.json() == []
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_due_date_cursor_crosses_null_boundary(client, auth_headers, sort_order):
+    import_csv(client, auth_headers, (
+        "title,due_date\n"
+        "a,2026-01-03T00:00:00\n"
+        "b,\n"
+        "c,2026-01-01T00:00:00\n"
+        "d,\n"
+        "e,2026-01-02T00:00:00\n"
+        "f,\n"
+    ))
+    params = {"sort_by": "due_date", "sort_order": sort_order}
+    expected = client.get("/api/todos", params=dict(params, limit=100), headers=auth_headers).json()
+
+    for limit in (1, 2, 4):
+        assert walk(client, auth_headers, limit=limit, **params) == expected
+
+    dated = [todo["due_date"] for todo in expected if todo["due_date"] is not None]
+    assert dated == sorted(dated, reverse=sort_order == "desc")
+    # NULL due dates are grouped at one end of the listing
+    nulls = [todo["due_date"] is None for todo in expected]
+    assert nulls in ([True] * 3 + [False] * 3, [False] * 3 + [True] * 3)
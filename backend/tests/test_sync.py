@@ -0,0 +1,49 @@
+"""
+Delta sync tokens and tombstone pruning
+"""
+
+from backend.db import engine
+from backend.sync import prune_tombstones
+
+
+def test_deletions_are_reported_until_pruned(client, auth_headers):
+    token = client.get("/api/todos/changes", headers=auth_headers).json()["next_token"]
+    todo_id = client.post("/api/todos", json={"title": "gone"}, headers=auth_headers).json()["id"]
+    assert client.delete(f"/api/todos/{todo_id}", headers=auth_headers).status_code == 204
+
+    changes = client.get("/api/todos/changes", params={"since": token}, headers=auth_headers).json()
+    assert changes["deleted"] == [todo_id]
+    assert changes["changed"] == []
+
+    assert prune_tombstones(engine, retention_days=0) >= 1
+    response = client.get("/api/todos/changes", params={"since": token}, headers=auth_headers)
+    assert response.status_code == 410
+
+    # A full sync hands out a token that is valid again
+    token = client.get("/api/todos/changes", headers=auth_headers).json()["next_token"]
+    response = client.get("/api/todos/changes", params={"since": token}, headers=auth_headers)
+    assert response.status_code == 200
+
+
+def test_first_sync_pages_past_pruned_deletions(client, auth_headers):
+    old = client.post("/api/todos", json={"title": "old"}, headers=auth_headers).json()["id"]
+    deleted = client.post("/api/todos", json={"title": "deleted"}, headers=auth_headers).json()["id"]
+    new = client.post("/api/todos", json={"title": "new"}, headers=auth_headers).json()["id"]
+    client.delete(f"/api/todos/{deleted}", headers=auth_headers)
+    prune_tombstones(engine, retention_days=0)
+
+    # "old" sorts before the pruned deletion, so the second page resumes below pruned_seq
+    seen, params = [], {"limit": 1}
+    while True:
+        page = client.get("/api/todos/changes", params=params, headers=auth_headers)
+        assert page.status_code == 200
+        page = page.json()
+        seen.extend(todo["id"] for todo in page["changed"])
+        params = {"limit": 1, "since": page["next_token"]}
+        if not page["has_more"]:
+            break
+    assert seen == [old, new]
+
+    changes = client.get("/api/todos/changes", params={"since": page["next_token"]}, headers=auth_headers)
+    assert changes.status_code == 200
+    assert changes.json()["changed"] == []
@@ -0,0 +1,33 @@
+"""
+Export and import round trips
+"""
+
+from backend.tests.conftest import import_csv, register
+
+
+def summary(todos):
+    return sorted((t["title"], t["completed"], t["priority"], t["due_date"]) for t in todos)
+
+
+def test_csv_export_round_trips_none_values(client, auth_headers):
+    client.post("/api/todos", json={"title": "plain", "priority": None}, headers=auth_headers)
+    client.post(
+        "/api/todos",
+        json={"title": "due", "priority": "high", "due_date": "2026-01-01T10:00:00", "completed": True},
+        headers=auth_headers,
+    )
+    exported = client.get("/api/todos/export", params={"format": "csv"}, headers=auth_headers).text
+
+    other = register(client)
+    assert import_csv(client, other, exported)["imported"] == 2
+
+    original = client.get("/api/todos", headers=auth_headers).json()
+    copied = client.get("/api/todos", headers=other).json()
+    assert summary(copied) == summary(original)
+    assert [t["priority"] for t in copied if t["title"] == "plain"] == [None]
+
+
+def test_csv_empty_cells_take_defaults(client, auth_headers):
+    assert import_csv(client, auth_headers, "title,completed\nx,\n")["imported"] == 1
+    todo, = client.get("/api/todos", headers=auth_headers).json()
+    assert todo["completed"] is False
@@ -0,0 +1,228 @@
+"""
+Bulk export and import of todos for Phase II Todo App
+
+Exports stream a single SELECT through a server-side cursor (yield_per),
+so every row comes from one snapshot and memory stays flat no matter how
+many todos a user has. Output is NDJSON (one TodoRead object per line,
+rendered like the API's JSON) or CSV, optionally gzip-compressed.
+
+Imports are parsed incrementally from the request body: NDJSON one object
+per line, or CSV with a header row (quoted fields may span lines). Only
+the current record is held in memory; unknown fields, such as the id and
+timestamps in an export, are ignored. In CSV an empty due_date or
+priority cell is None, as exported.
+"""
+
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, Callable, Dict, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+
+from backend.db import READ, open_session
+from backend.models import Todo
+from backend.serialization import TODO_READ_COLUMNS, TODO_READ_FIELDS, dumps, todo_dict
+
+# Rows fetched from the cursor (and encoded) per chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Rows per import batch (one transaction each), and the largest batch a client may ask for
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+MAX_IMPORT_BATCH_SIZE = 10000
+
+# Per-line errors reported in an import summary
+MAX_IMPORT_ERRORS = 1000
+
+# Longest single import record
+MAX_IMPORT_RECORD_LENGTH = 64 * 1024
+
+# Importable fields that may be None, which CSV exports write as an empty cell
+CSV_NULLABLE_FIELDS = {"due_date", "priority"}
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+def _ndjson_chunk(rows: Sequence[Sequence]) -> bytes:
+    return b"".join(dumps(todo_dict(row)) + b"\n" for row in rows)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _csv_chunk(rows: Sequence[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _csv_header() -> bytes:
+    return _csv_chunk([TODO_READ_FIELDS])
+
+
+async def stream_export(user_id: UUID, export_format: str, compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Yield an export of every todo the user owns, oldest first.
+
+    The generator opens its own read session, because it keeps running
+    after the route function has returned.
+    """
+    encode: Callable[[Sequence[Sequence]], bytes] = _csv_chunk if export_format == "csv" else _ndjson_chunk
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def output(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor is not None else data
+
+    if export_format == "csv":
+        yield output(_csv_header())
+
+    query = (
+        select(*TODO_READ_COLUMNS)
+        .where(Todo.user_id == user_id)
+        .order_by(Todo.created_at, Todo.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async with open_session(READ, user_id) as session:
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            chunk = output(encode(rows))
+            if chunk:
+                yield chunk
+
+    if compressor is not None:
+        yield compressor.flush()
+
+
+class ImportStopped(Exception):
+    """The upload cannot be parsed any further (bad encoding, runaway record)."""
+
+    def __init__(self, line: int, detail: str):
+        super().__init__(detail)
+        self.line = line
+        self.detail = detail
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Split UTF-8 chunks into (line number, line) pairs, 1-based."""
+    # A newline byte never occurs inside a multi-byte UTF-8 sequence, so
+    # lines can be split before decoding
+    buffer = b""
+    line_number = 0
+
+    def decode(line: bytes) -> str:
+        try:
+            text = line.decode("utf-8")
+        except UnicodeDecodeError:
+            raise ImportStopped(line_number, "Line is not valid UTF-8")
+        if line_number == 1:
+            text = text.lstrip("\ufeff")
+        return text.rstrip("\r")
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, decode(line)
+        if len(buffer) > MAX_IMPORT_RECORD_LENGTH:
+            raise ImportStopped(line_number + 1, "Line is too long")
+    if buffer.strip():
+        line_number += 1
+        yield line_number, decode(buffer)
+
+
+ImportRecord = Tuple[int, Optional[Dict], Optional[str]]
+
+
+async def _iter_ndjson_records(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ImportRecord]:
+    async for line_number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(values, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, values, None
+
+
+async def _iter_csv_records(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[ImportRecord]:
+    header = None
+    pending = []
+    start = 0
+    length = 0
+    async for line_number, line in lines:
+        if not pending:
+            start, length = line_number, 0
+        pending.append(line)
+        length += len(line)
+        if length > MAX_IMPORT_RECORD_LENGTH:
+            raise ImportStopped(start, "Record is too long (unterminated quoted field?)")
+
+        # An odd number of quotes means a quoted field continues on the next line
+        record = "\n".join(pending)
+        if record.count('"') % 2:
+            continue
+        pending = []
+
+        if not record.strip():
+            continue
+        try:
+            values = next(csv.reader([record]))
+        except csv.Error as e:
+            yield start, None, f"Invalid CSV: {e}"
+            continue
+
+        if header is None:
+            header = [name.strip() for name in values]
+            if "title" not in header:
+                raise ImportStopped(start, "CSV header must include a title column")
+            continue
+        if len(values) != len(header):
+            yield start, None, f"Expected {len(header)} fields, got {len(values)}"
+            continue
+        # Exports write None as an empty cell, so an empty nullable field
+        # reads back as None; other empty cells fall back to the default
+        yield start, {
+            name: value if value != "" else None
+            for name, value in zip(header, values)
+            if value != "" or name in CSV_NULLABLE_FIELDS
+        }, None
+
+    if pending:
+        yield start, None, "Unterminated quoted field"
+
+
+def parse_import(chunks: AsyncIterator[bytes], import_format: str) -> AsyncIterator[ImportRecord]:
+    """
+    Yield (line number, field values, error) for each record of an upload.
+
+    Exactly one of field values and error is set. Raises ImportStopped when
+    the rest of the upload cannot be read.
+    """
+    lines = _iter_lines(chunks)
+    if import_format == "csv":
+        return _iter_csv_records(lines)
+    return _iter_ndjson_records(lines)